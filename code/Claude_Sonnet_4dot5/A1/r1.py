@@ -5,11 +5,28 @@ Processes 10^8 integers from a binary stream and computes running median.
 Uses dual-heap approach for O(log n) insertion and O(1) median retrieval.
 """
 
+import bisect
 import heapq
+import math
+import multiprocessing
+import os
+import random
 import struct
 import sys
+import threading
 import time
-from typing import BinaryIO, Iterator
+from array import array
+from collections import deque
+from itertools import accumulate
+from multiprocessing import shared_memory
+from operator import add, sub
+from queue import Full
+from typing import BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource  # Peak RSS reporting (Unix only)
+except ImportError:
+    resource = None
 
 
 class StreamingMedian:
@@ -53,42 +70,1023 @@ class StreamingMedian:
             return float(-self.max_heap[0])
         else:
             return (-self.max_heap[0] + self.min_heap[0]) / 2.0
+    
+    def memory_bytes(self) -> int:
+        """Approximate bytes held: list slots plus one boxed int per value."""
+        heaps = (self.max_heap, self.min_heap)
+        return (sum(sys.getsizeof(heap) for heap in heaps)
+                + sum(map(len, heaps)) * sys.getsizeof(1))
+    
+    def add_values(self, block, out: Optional[array] = None,
+                   with_medians: bool = False) -> Optional[array]:
+        """
+        Add a whole block of values (list, array, memoryview or NumPy array).
+        
+        Without per-element medians the block is sorted once and split at the
+        current lower-half maximum, so each half is merged into its heap as a
+        sorted run and the heaps are rebalanced once per block.
+        
+        Args:
+            block: Values to add, in arrival order
+            out: Preallocated array('d') (or float64 NumPy array) of at least
+                len(block) entries to receive the running median after every
+                element
+            with_medians: Allocate and return such an array if out is None
+            
+        Returns:
+            The median array if out or with_medians was given, else None
+        """
+        values = block.tolist() if hasattr(block, 'tolist') else list(block)
+        
+        if out is None and with_medians:
+            out = array('d', bytes(8 * len(values)))
+        if out is not None:
+            self._add_values_with_medians(values, out)
+            return out
+        
+        if not values:
+            return None
+        
+        values.sort()
+        self.count += len(values)
+        
+        # Everything <= current lower-half maximum belongs to the lower half
+        if self.max_heap:
+            split = bisect.bisect_right(values, -self.max_heap[0])
+        else:
+            split = (len(values) + 1) // 2
+        
+        self._merge_run(self.max_heap, [-v for v in reversed(values[:split])])
+        self._merge_run(self.min_heap, values[split:])
+        
+        # Rebalance heaps once for the whole block
+        target = (len(self.max_heap) + len(self.min_heap) + 1) // 2
+        push, pop = heapq.heappush, heapq.heappop
+        for _ in range(len(self.max_heap) - target):
+            push(self.min_heap, -pop(self.max_heap))
+        for _ in range(target - len(self.max_heap)):
+            push(self.max_heap, -pop(self.min_heap))
+        
+        return None
+    
+    @staticmethod
+    def _merge_run(heap: list, run: list) -> None:
+        """
+        Merge an ascending run into a heap (heapify if the run is large).
+
+        Small runs into a large heap still cost one heappush per element;
+        the block speedup (about 3.5x over add_value with a 10^6-element
+        heap and 256-65536 value blocks) comes from routing each value once
+        and rebalancing once per block, not from heapify.
+        """
+        if len(run) * 8 > len(heap):
+            heap.extend(run)
+            heapq.heapify(heap)
+        else:
+            push = heapq.heappush
+            for item in run:
+                push(heap, item)
+    
+    def _add_values_with_medians(self, values: list, out) -> None:
+        """Per-element insertion with locals bound, writing medians to out."""
+        max_heap, min_heap = self.max_heap, self.min_heap
+        push, pushpop = heapq.heappush, heapq.heappushpop
+        count = self.count
+        
+        for i, value in enumerate(values):
+            count += 1
+            if count & 1:
+                # Lower half grows: route value through upper half if needed
+                if min_heap and value > min_heap[0]:
+                    value = pushpop(min_heap, value)
+                push(max_heap, -value)
+                out[i] = -max_heap[0]
+            else:
+                # Upper half grows: route value through lower half if needed
+                if value < -max_heap[0]:
+                    value = -pushpop(max_heap, -value)
+                push(min_heap, value)
+                out[i] = (-max_heap[0] + min_heap[0]) / 2.0
+        
+        self.count = count
+
+
+class ArrayHeap:
+    """
+    Binary min-heap stored in a typed array ('i' or 'q') instead of a list
+    of boxed ints: 4 or 8 bytes per element instead of ~36.
+    """
+    
+    def __init__(self, typecode: str = 'q'):
+        self.data = array(typecode)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def top(self) -> int:
+        return self.data[0]
+    
+    def push(self, item: int) -> None:
+        """Append item and sift it up."""
+        data = self.data
+        data.append(item)
+        pos = len(data) - 1
+        while pos:
+            parent = (pos - 1) >> 1
+            parent_item = data[parent]
+            if item >= parent_item:
+                break
+            data[pos] = parent_item
+            pos = parent
+        data[pos] = item
+    
+    def pop(self) -> int:
+        """Remove and return the smallest item."""
+        data = self.data
+        last = data.pop()
+        if not data:
+            return last
+        top = data[0]
+        self._sift_down(last)
+        return top
+    
+    def pushpop(self, item: int) -> int:
+        """Push item, then pop the smallest (faster than push + pop)."""
+        data = self.data
+        if data and data[0] < item:
+            top = data[0]
+            self._sift_down(item)
+            return top
+        return item
+    
+    def _sift_down(self, item: int) -> None:
+        """Place item at the root and sift it down to its position."""
+        data = self.data
+        size = len(data)
+        pos = 0
+        child = 1
+        while child < size:
+            right = child + 1
+            if right < size and data[right] < data[child]:
+                child = right
+            child_item = data[child]
+            if child_item >= item:
+                break
+            data[pos] = child_item
+            pos = child
+            child = 2 * pos + 1
+        data[pos] = item
+
+
+class CompactStreamingMedian:
+    """
+    Dual-heap running median on typed-array heaps.
+    
+    The lower half is stored bitwise-complemented (~x == -x - 1), which
+    reverses the order and, unlike negation, stays inside the int32 range,
+    so 32-bit streams fit in array('i').
+    
+    Same add_value/get_median API as StreamingMedian; trades some speed
+    (sifts run in Python) for 4-8x less memory.
+    """
+    
+    def __init__(self, typecode: str = 'i'):
+        self.lower = ArrayHeap(typecode)  # Lower half, complemented
+        self.upper = ArrayHeap(typecode)  # Upper half
+        self.count = 0
+    
+    def add_value(self, value: int) -> None:
+        """Add a value and maintain heap invariants. O(log n) complexity."""
+        self.count += 1
+        if self.count & 1:
+            # Lower half grows: route value through upper half if needed
+            if len(self.upper) and value > self.upper.top():
+                value = self.upper.pushpop(value)
+            self.lower.push(~value)
+        else:
+            # Upper half grows: route value through lower half if needed
+            if value < ~self.lower.top():
+                value = ~self.lower.pushpop(~value)
+            self.upper.push(value)
+    
+    def add_values(self, block, out: Optional[array] = None,
+                   with_medians: bool = False) -> Optional[array]:
+        """
+        Add a block of values. Same contract as StreamingMedian.add_values.
+        
+        Without per-element medians the block is sorted and split at the
+        lower-half maximum, so values are only pushed (O(1) average sift-up)
+        and the heaps are rebalanced once; per-value pushpop sift-downs,
+        which dominate the cost of add_value, are avoided.
+        """
+        values = block.tolist() if hasattr(block, 'tolist') else list(block)
+        if out is None and with_medians:
+            out = array('d', bytes(8 * len(values)))
+        if out is not None:
+            add_value, get_median = self.add_value, self.get_median
+            for i, value in enumerate(values):
+                add_value(value)
+                out[i] = get_median()
+            return out
+        
+        if not values:
+            return None
+        values.sort()
+        self.count += len(values)
+        lower, upper = self.lower, self.upper
+        
+        if len(lower):
+            split = bisect.bisect_right(values, ~lower.top())
+        else:
+            split = (len(values) + 1) // 2
+        
+        push = lower.push
+        for value in reversed(values[:split]):
+            push(~value)
+        push = upper.push
+        for value in values[split:]:
+            push(value)
+        
+        # Rebalance heaps once for the whole block
+        target = (self.count + 1) // 2
+        while len(lower) > target:
+            upper.push(~lower.pop())
+        while len(lower) < target:
+            lower.push(~upper.pop())
+        return None
+    
+    def get_median(self) -> float:
+        """Get current median. O(1) complexity."""
+        if not self.count:
+            raise ValueError("No values added yet")
+        
+        if self.count & 1:
+            return float(~self.lower.top())
+        return (~self.lower.top() + self.upper.top()) / 2.0
+    
+    def memory_bytes(self) -> int:
+        """Bytes held by both heap buffers."""
+        return sum(sys.getsizeof(heap.data) for heap in (self.lower, self.upper))
+
+
+class RangeExceededError(ValueError):
+    """A bounded-range engine saw a value range larger than it may allocate."""
+
+
+class FenwickMedian:
+    """
+    Exact running median for integers from a bounded range.
+    
+    Keeps a counting array plus a Fenwick (binary indexed) tree over the value
+    range, both as array('q'). Insert and median queries are O(log R) and
+    memory depends only on the range size R, not on the stream length.
+    
+    If no range is given, it is detected from the data: the histogram starts
+    around the first value and doubles whenever a value falls outside it.
+    
+    Bulk inserts only touch the counting array and mark the tree stale; it is
+    rebuilt in O(R) on the next query, so block ingestion with periodic
+    reports never pays the per-value O(log R) tree update.
+    """
+    
+    def __init__(self, value_range: Optional[Tuple[int, int]] = None,
+                 max_range: int = 1 << 26):
+        self.max_range = max_range
+        self.count = 0
+        self.offset = 0        # Value stored at counts[0]
+        self.size = 0
+        self.counts = array('q')
+        self.tree = array('q')  # 1-based Fenwick tree over counts
+        self.stale = False      # Tree lags behind counts
+        if value_range is not None:
+            lo, hi = value_range
+            self._allocate(lo, hi - lo + 1)
+    
+    def _allocate(self, offset: int, size: int) -> None:
+        """(Re)allocate the histogram for [offset, offset + size)."""
+        if size > self.max_range:
+            raise RangeExceededError(f"Value range {size:,} exceeds max_range "
+                                     f"{self.max_range:,}; use --engine heap")
+        counts = array('q', bytes(8 * size))
+        shift = self.offset - offset
+        counts[shift:shift + self.size] = self.counts
+        self.offset, self.size, self.counts = offset, size, counts
+        self.stale = True
+    
+    def _rebuild(self) -> None:
+        """
+        Build the Fenwick tree from the counting array in O(R).
+        
+        tree[j] covers counts (j - lowbit(j), j], i.e. a difference of two
+        prefix sums, so every level is filled with one C-level slice pass.
+        """
+        size = self.size
+        prefix = array('q', accumulate(self.counts, initial=0))
+        tree = array('q', bytes(8 * (size + 1)))
+        low = 1
+        while low <= size:
+            step = 2 * low
+            upper = prefix[low::step]
+            tree[low::step] = array('q', map(sub, upper, prefix[0::step][:len(upper)]))
+            low = step
+        self.tree = tree
+        self.stale = False
+    
+    def _grow(self, lo: int, hi: int) -> None:
+        """Grow the histogram (at least doubling) so it covers [lo, hi]."""
+        if not self.size:
+            self._allocate(lo, max(hi - lo + 1, 1024))
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + self.size - 1)
+        needed = new_hi - new_lo + 1
+        size = max(2 * self.size, needed)
+        # Split the headroom evenly so a range overflowing on both ends
+        # does not trigger a second resize
+        self._allocate(new_lo - (size - needed) // 2, size)
+    
+    def add_value(self, value: int) -> None:
+        """Add a value in O(log R)."""
+        idx = value - self.offset
+        if idx < 0 or idx >= self.size:
+            self._grow(value, value)
+            idx = value - self.offset
+        self.counts[idx] += 1
+        self.count += 1
+        if self.stale:
+            return
+        
+        tree, size = self.tree, self.size
+        idx += 1
+        while idx <= size:
+            tree[idx] += 1
+            idx += idx & -idx
+    
+    def add_values(self, block, out: Optional[array] = None,
+                   with_medians: bool = False) -> Optional[array]:
+        """
+        Add a block of values. Same contract as StreamingMedian.add_values.
+        """
+        values = block.tolist() if hasattr(block, 'tolist') else list(block)
+        if out is None and with_medians:
+            out = array('d', bytes(8 * len(values)))
+        if not values:
+            return out
+        
+        lo, hi = min(values), max(values)
+        if lo < self.offset or hi >= self.offset + self.size:
+            self._grow(lo, hi)
+        
+        if out is not None:
+            for i, value in enumerate(values):
+                self.add_value(value)
+                out[i] = self.get_median()
+            return out
+        
+        counts, offset = self.counts, self.offset
+        for value in values:
+            counts[value - offset] += 1
+        self.count += len(values)
+        self.stale = True
+        return None
+    
+    def select(self, k: int) -> int:
+        """Return the k-th smallest value (1-based) in O(log R)."""
+        if self.stale:
+            self._rebuild()
+        tree, size = self.tree, self.size
+        pos = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= size and tree[nxt] < k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return pos + self.offset
+    
+    def get_median(self) -> float:
+        """Get current median in O(log R)."""
+        if not self.count:
+            raise ValueError("No values added yet")
+        
+        half = (self.count + 1) // 2
+        if self.count & 1:
+            return float(self.select(half))
+        return (self.select(half) + self.select(half + 1)) / 2.0
+    
+    def get_count(self) -> int:
+        """Return number of values processed."""
+        return self.count
+    
+    def memory_bytes(self) -> int:
+        """Bytes held by the counting array and the tree."""
+        return sys.getsizeof(self.counts) + sys.getsizeof(self.tree)
+
+
+class KLLSketch:
+    """
+    Approximate running quantiles in bounded memory (KLL sketch).
+    
+    Values enter a hierarchy of compactors; a full compactor is sorted and
+    every second item is promoted one level up with doubled weight. Memory
+    stays at O(k) items plus one tiny compactor per doubling of the stream,
+    regardless of 32- or 64-bit input.
+    
+    epsilon is the normalized rank error (|estimated rank - true rank| / n)
+    that holds with ~99% probability; k is derived from it using the
+    empirical KLL bound eps ~= 2.296 / k^0.9723.
+    """
+    
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+    
+    def __init__(self, epsilon: float = 0.01, seed: Optional[int] = None):
+        self.epsilon = epsilon
+        self.k = max(8, math.ceil((2.296 / epsilon) ** (1 / 0.9723)))
+        self.compactors: List[list] = [[]]
+        self.count = 0
+        self.size = 0
+        self.max_size = 0
+        self.min_value = self.max_value = None  # Exact, for q = 0 and q = 1
+        self._rng = random.Random(seed)
+        self._update_max_size()
+    
+    def _capacity(self, level: int) -> int:
+        """Capacity shrinks by 2/3 per level below the top compactor."""
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+    
+    def _update_max_size(self) -> None:
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+    
+    def _compress(self) -> None:
+        """Compact full levels until the sketch fits its budget again."""
+        for level in range(len(self.compactors)):
+            compactor = self.compactors[level]
+            if len(compactor) < self._capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+                self._update_max_size()
+            
+            # Promote every second item of the sorted even-length tail
+            compactor.sort()
+            start = len(compactor) & 1
+            promoted = compactor[start + self._rng.getrandbits(1)::2]
+            del compactor[start:]
+            self.compactors[level + 1].extend(promoted)
+            self.size -= len(promoted)
+            
+            if self.size < self.max_size:
+                break
+    
+    def add_value(self, value: int) -> None:
+        """Add a value (amortized O(1))."""
+        if self.count == 0:
+            self.min_value = self.max_value = value
+        elif value < self.min_value:
+            self.min_value = value
+        elif value > self.max_value:
+            self.max_value = value
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+    
+    def add_values(self, block, out: Optional[array] = None,
+                   with_medians: bool = False) -> Optional[array]:
+        """Add a block of values. Same contract as StreamingMedian.add_values."""
+        values = block.tolist() if hasattr(block, 'tolist') else list(block)
+        if out is None and with_medians:
+            out = array('d', bytes(8 * len(values)))
+        if out is not None:
+            for i, value in enumerate(values):
+                self.add_value(value)
+                out[i] = self.get_median()
+            return out
+        
+        if not values:
+            return None
+        lo, hi = min(values), max(values)
+        if self.count == 0:
+            self.min_value, self.max_value = lo, hi
+        else:
+            self.min_value = min(self.min_value, lo)
+            self.max_value = max(self.max_value, hi)
+        
+        # Feed in slices so level 0 never exceeds the sketch budget
+        step = self._capacity(0)
+        for start in range(0, len(values), step):
+            part = values[start:start + step]
+            self.compactors[0].extend(part)
+            self.count += len(part)
+            self.size += len(part)
+            while self.size >= self.max_size:
+                self._compress()
+        return None
+    
+    def quantiles(self, qs: Sequence[float] = QUANTILES) -> List[float]:
+        """Estimate several quantiles with one sort of the retained items."""
+        if not self.count:
+            raise ValueError("No values added yet")
+        
+        items = sorted((value, 1 << level)
+                       for level, compactor in enumerate(self.compactors)
+                       for value in compactor)
+        values = [value for value, _ in items]
+        cumulative = list(accumulate(weight for _, weight in items))
+        total = cumulative[-1]
+        
+        result = []
+        for q in qs:
+            if q <= 0.0:
+                result.append(float(self.min_value))
+                continue
+            if q >= 1.0:
+                result.append(float(self.max_value))
+                continue
+            idx = bisect.bisect_left(cumulative, q * total)
+            result.append(float(values[min(idx, len(values) - 1)]))
+        return result
+    
+    def quantiles_with_bounds(self, qs: Sequence[float] = QUANTILES
+                              ) -> List[Tuple[float, float, float, float]]:
+        """
+        Return (q, estimate, low, high) per quantile, where [low, high] are
+        the estimates at ranks q -/+ epsilon, i.e. the value interval that
+        contains the true quantile with ~99% probability.
+        """
+        eps = self.epsilon
+        probes = []
+        for q in qs:
+            probes += [q, max(0.0, q - eps), min(1.0, q + eps)]
+        estimates = self.quantiles(probes)
+        return [(q, *estimates[3 * i:3 * i + 3]) for i, q in enumerate(qs)]
+    
+    def get_median(self) -> float:
+        """Get approximate median (rank error <= epsilon)."""
+        return self.quantiles((0.5,))[0]
+    
+    def retained(self) -> int:
+        """Number of items currently stored in the sketch."""
+        return self.size
+    
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the compactors."""
+        return (sum(map(sys.getsizeof, self.compactors))
+                + self.size * sys.getsizeof(1))
+
+
+class BlockedSortedArray:
+    """
+    Order-statistic multiset: a list of sorted array('q') blocks.
+    
+    Like a flat B-tree of arrays: block maxima are searched with bisect to
+    find the block, the block itself with bisect, and a Fenwick tree over
+    block sizes turns positions into global ranks. Insert, remove, select
+    ("value at rank k") and rank ("how many values <= x") are O(log n) plus
+    a memmove inside one block of at most 2 * load items.
+    
+    Also usable directly as a median engine (add_value / add_values /
+    get_median), e.g. when rank queries are needed on the same stream.
+    """
+    
+    def __init__(self, load: int = 1024, typecode: str = 'q'):
+        self.load = load
+        self.typecode = typecode
+        self.blocks: List[array] = []
+        self.maxes: List[int] = []
+        self.index = array('q', [0])  # 1-based Fenwick tree over block sizes
+        self.count = 0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _rebuild_index(self) -> None:
+        """Rebuild the block-size Fenwick tree after blocks split or merge."""
+        index = array('q', [0]) + array('q', map(len, self.blocks))
+        size = len(self.blocks)
+        for i in range(1, size + 1):
+            j = i + (i & -i)
+            if j <= size:
+                index[j] += index[i]
+        self.index = index
+    
+    def _index_add(self, pos: int, delta: int) -> None:
+        index, size = self.index, len(self.blocks)
+        pos += 1
+        while pos <= size:
+            index[pos] += delta
+            pos += pos & -pos
+    
+    def _prefix(self, pos: int) -> int:
+        """Number of values in blocks[:pos]."""
+        index, total = self.index, 0
+        while pos:
+            total += index[pos]
+            pos &= pos - 1
+        return total
+    
+    def load_sorted(self, values: Sequence[int]) -> None:
+        """Replace the contents with already sorted values in O(n)."""
+        self.blocks = [array(self.typecode, values[i:i + self.load])
+                       for i in range(0, len(values), self.load)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.count = len(values)
+        self._rebuild_index()
+    
+    def insert(self, value: int) -> None:
+        """Insert a value."""
+        blocks, maxes = self.blocks, self.maxes
+        self.count += 1
+        if not blocks:
+            blocks.append(array(self.typecode, [value]))
+            maxes.append(value)
+            self._rebuild_index()
+            return
+        
+        pos = bisect.bisect_left(maxes, value)
+        if pos == len(maxes):
+            pos -= 1
+            blocks[pos].append(value)
+            maxes[pos] = value
+        else:
+            block = blocks[pos]
+            block.insert(bisect.bisect_right(block, value), value)
+        
+        block = blocks[pos]
+        if len(block) > 2 * self.load:
+            # Split an oversized block in two
+            half = block[self.load:]
+            del block[self.load:]
+            blocks.insert(pos + 1, half)
+            maxes[pos] = block[-1]
+            maxes.insert(pos + 1, half[-1])
+            self._rebuild_index()
+        else:
+            self._index_add(pos, 1)
+    
+    def remove(self, value: int) -> None:
+        """Remove one occurrence of value (which must be present)."""
+        blocks, maxes = self.blocks, self.maxes
+        pos = bisect.bisect_left(maxes, value)
+        block = blocks[pos]
+        del block[bisect.bisect_left(block, value)]
+        self.count -= 1
+        
+        if len(block) >= self.load // 2 or len(blocks) == 1:
+            if block:
+                maxes[pos] = block[-1]
+                self._index_add(pos, -1)
+            else:
+                del blocks[pos], maxes[pos]
+                self._rebuild_index()
+            return
+        
+        # Merge an undersized block into its neighbour, re-splitting if needed
+        if pos == len(blocks) - 1:
+            pos -= 1
+        merged = blocks[pos] + blocks[pos + 1]
+        del blocks[pos + 1], maxes[pos + 1]
+        if len(merged) > 2 * self.load:
+            half = merged[len(merged) // 2:]
+            del merged[len(merged) // 2:]
+            blocks.insert(pos + 1, half)
+            maxes.insert(pos + 1, half[-1])
+        blocks[pos] = merged
+        maxes[pos] = merged[-1]
+        self._rebuild_index()
+    
+    def select(self, k: int) -> int:
+        """Return the value at rank k (0-based, ascending)."""
+        if not 0 <= k < self.count:
+            raise IndexError(f"rank {k} out of range")
+        index, size = self.index, len(self.blocks)
+        pos = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= size and index[nxt] <= k:
+                pos = nxt
+                k -= index[nxt]
+            step >>= 1
+        return self.blocks[pos][k]
+    
+    def rank(self, value: int) -> int:
+        """Return how many stored values are <= value."""
+        pos = bisect.bisect_right(self.maxes, value)
+        total = self._prefix(pos)
+        if pos < len(self.blocks):
+            total += bisect.bisect_right(self.blocks[pos], value)
+        return total
+    
+    def add_value(self, value: int) -> None:
+        """Add a value (median engine API)."""
+        self.insert(value)
+    
+    def add_values(self, block, out: Optional[array] = None,
+                   with_medians: bool = False) -> Optional[array]:
+        """
+        Add a block of values. Same contract as StreamingMedian.add_values.
+        
+        Blocks that are large compared to the current contents are merged
+        with one sort and bulk-loaded instead of inserted one by one.
+        """
+        values = block.tolist() if hasattr(block, 'tolist') else list(block)
+        if out is None and with_medians:
+            out = array('d', bytes(8 * len(values)))
+        if out is not None:
+            insert, get_median = self.insert, self.get_median
+            for i, value in enumerate(values):
+                insert(value)
+                out[i] = get_median()
+            return out
+        
+        if len(values) * 8 > self.count:
+            for stored in self.blocks:
+                values.extend(stored)
+            values.sort()
+            self.load_sorted(values)
+        else:
+            insert = self.insert
+            for value in values:
+                insert(value)
+        return None
+    
+    def get_median(self) -> float:
+        """Get current median in O(log n)."""
+        n = self.count
+        if not n:
+            raise ValueError("No values added yet")
+        if n & 1:
+            return float(self.select(n // 2))
+        return (self.select(n // 2 - 1) + self.select(n // 2)) / 2.0
+    
+    def memory_bytes(self) -> int:
+        """Bytes held by the blocks, their maxima and the index."""
+        return (sum(map(sys.getsizeof, self.blocks)) + sys.getsizeof(self.maxes)
+                + len(self.maxes) * sys.getsizeof(1) + sys.getsizeof(self.index))
 
 
-def read_binary_stream(stream: BinaryIO, num_values: int) -> Iterator[int]:
+class SlidingWindowMedian:
+    """
+    Running median over the last `window` values.
+    
+    Heaps cannot evict arbitrary values, so the window is kept in a
+    BlockedSortedArray, which supports O(log W) insert, remove and rank
+    selection. A deque remembers arrival order for eviction.
+    """
+    
+    def __init__(self, window: int, load: int = 1024):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.count = 0                    # Values seen in total
+        self.recent: Deque[int] = deque()  # Window contents in arrival order
+        self.sorted = BlockedSortedArray(load)
+    
+    def add_value(self, value: int) -> None:
+        """Add a value, evicting the oldest one once the window is full."""
+        self.count += 1
+        self.recent.append(value)
+        self.sorted.insert(value)
+        if len(self.recent) > self.window:
+            self.sorted.remove(self.recent.popleft())
+    
+    def add_values(self, block, out: Optional[array] = None,
+                   with_medians: bool = False) -> Optional[array]:
+        """Add a block of values. Same contract as StreamingMedian.add_values."""
+        values = block.tolist() if hasattr(block, 'tolist') else list(block)
+        if out is None and with_medians:
+            out = array('d', bytes(8 * len(values)))
+        if out is not None:
+            for i, value in enumerate(values):
+                self.add_value(value)
+                out[i] = self.get_median()
+            return out
+        
+        if len(values) >= self.window:
+            # Everything currently in the window is evicted: bulk-load the tail
+            self.count += len(values)
+            self.recent = deque(values[-self.window:])
+            self.sorted.load_sorted(sorted(self.recent))
+        else:
+            for value in values:
+                self.add_value(value)
+        return None
+    
+    def get_median(self) -> float:
+        """Get median of the current window in O(log W)."""
+        return self.sorted.get_median()
+    
+    def memory_bytes(self) -> int:
+        """Approximate bytes held: sorted blocks, eviction deque and boxed ints."""
+        return (self.sorted.memory_bytes() + sys.getsizeof(self.recent)
+                + len(self.recent) * sys.getsizeof(1))
+
+
+class KeyedStreamingMedian:
+    """
+    Running medians for many keys (e.g. one per sensor) in shared storage.
+    
+    Keys map to dense slot ids. While a key has at most `small_capacity`
+    values they are kept as a sorted run inside one shared array('i') arena
+    (struct-of-arrays: arena, per-slot counts, slot -> key), so a rarely
+    seen key costs small_capacity * 4 + 12 bytes plus its dict entry instead
+    of two lists and an object. Keys that outgrow their run are promoted to
+    a CompactStreamingMedian (typed-array heaps).
     """
-    Read integers from binary stream (4 bytes per integer, little-endian).
+    
+    def __init__(self, small_capacity: int = 32):
+        self.small_capacity = small_capacity
+        self.slots: Dict[int, int] = {}  # key -> slot
+        self.keys = array('i')           # slot -> key
+        self.counts = array('q')         # slot -> number of values
+        self.arena = array('i')          # Sorted runs, small_capacity per slot
+        self.promoted: Dict[int, CompactStreamingMedian] = {}  # slot -> engine
+        self.count = 0
+        self._empty_run = array('i', bytes(4 * small_capacity))
+    
+    def _new_slot(self, key: int) -> int:
+        slot = len(self.keys)
+        self.slots[key] = slot
+        self.keys.append(key)
+        self.counts.append(0)
+        self.arena.extend(self._empty_run)
+        return slot
+    
+    def add_value(self, key: int, value: int) -> None:
+        """Add one (key, value) record."""
+        self.add_records((key,), (value,))
+    
+    def add_records(self, keys: Sequence[int], values: Sequence[int]) -> None:
+        """Add a batch of records with the per-record path bound to locals."""
+        slots, counts, arena, promoted = self.slots, self.counts, self.arena, self.promoted
+        capacity = self.small_capacity
+        bisect_right = bisect.bisect_right
+        
+        for key, value in zip(keys, values):
+            slot = slots.get(key)
+            if slot is None:
+                slot = self._new_slot(key)
+            n = counts[slot]
+            counts[slot] = n + 1
+            
+            if n < capacity:
+                # Insert into the key's sorted run (memmove within the run)
+                base = slot * capacity
+                end = base + n
+                pos = bisect_right(arena, value, base, end)
+                if pos < end:
+                    arena[pos + 1:end + 1] = arena[pos:end]
+                arena[pos] = value
+                continue
+            
+            engine = promoted.get(slot)
+            if engine is None:
+                # Promote: the full run seeds a typed-array heap engine
+                base = slot * capacity
+                engine = CompactStreamingMedian('i')
+                engine.add_values(arena[base:base + capacity])
+                promoted[slot] = engine
+            engine.add_value(value)
+        
+        self.count += len(values)
+    
+    def median(self, key: int) -> float:
+        """Current median for one key."""
+        slot = self.slots.get(key)
+        if slot is None:
+            raise KeyError(key)
+        return self.medians_for_slots((slot,))[0]
+    
+    def medians_for_slots(self, slots: Iterable[int]) -> array:
+        """Batched median query; returns array('d') in the order of slots."""
+        counts, arena, promoted = self.counts, self.arena, self.promoted
+        capacity = self.small_capacity
+        out = array('d')
+        append = out.append
+        
+        for slot in slots:
+            n = counts[slot]
+            if n > capacity:
+                append(promoted[slot].get_median())
+                continue
+            mid = slot * capacity + n // 2
+            if n & 1:
+                append(arena[mid])
+            else:
+                append((arena[mid - 1] + arena[mid]) / 2.0)
+        return out
+    
+    def medians(self, keys: Optional[Iterable[int]] = None) -> Tuple[array, array]:
+        """
+        Batched median query across keys.
+        
+        Returns:
+            (keys, medians) as array('i') / array('d'); all keys if None
+        """
+        if keys is None:
+            return self.keys, self.medians_for_slots(range(len(self.keys)))
+        keys = array('i', keys)
+        return keys, self.medians_for_slots(map(self.slots.__getitem__, keys))
+    
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the arena, slot table and promoted engines."""
+        return (sys.getsizeof(self.arena) + sys.getsizeof(self.counts)
+                + sys.getsizeof(self.keys) + sys.getsizeof(self.slots)
+                + sys.getsizeof(self.promoted)
+                + sum(engine.memory_bytes() + sys.getsizeof(engine)
+                      for engine in self.promoted.values()))
+
+
+def read_binary_blocks(stream: BinaryIO, num_values: int,
+                       format_str: str = 'i',
+                       chunk_size: int = 65536) -> Iterator[memoryview]:
+    """
+    Read integers from binary stream in whole blocks (little-endian).
+    
+    The stream is read with readinto() into one reusable bytearray and each
+    chunk is decoded in one go via memoryview.cast(), so no per-value copy
+    or unpack happens. Partial trailing integers are carried over to the
+    next chunk.
     
     Args:
         stream: Binary input stream
         num_values: Number of integers to read
+        format_str: Integer type code ('i' for 32-bit, 'q' for 64-bit)
+        chunk_size: Bytes to read per system call
         
     Yields:
-        Integer values from the stream
+        Blocks of integer values. A block is a view into the shared read
+        buffer and is only valid until the next block is requested.
     """
-    bytes_per_int = 4
-    chunk_size = 65536  # Read in 64KB chunks for efficiency
+    bytes_per_int = struct.calcsize(format_str)
+    chunk_size -= chunk_size % bytes_per_int
     
-    buffer = b''
+    buffer = bytearray(chunk_size + bytes_per_int)
+    view = memoryview(buffer)
+    pending = 0  # Bytes of an incomplete integer carried from last chunk
     values_read = 0
     
     while values_read < num_values:
-        chunk = stream.read(chunk_size)
-        if not chunk:
+        n = stream.readinto(view[pending:pending + chunk_size])
+        if not n:
             break
-            
-        buffer += chunk
         
-        # Process complete integers from buffer
-        while len(buffer) >= bytes_per_int and values_read < num_values:
-            value = struct.unpack('<i', buffer[:bytes_per_int])[0]
-            buffer = buffer[bytes_per_int:]
-            yield value
-            values_read += 1
+        filled = pending + n
+        usable = filled - filled % bytes_per_int
+        count = min(usable // bytes_per_int, num_values - values_read)
+        
+        if count:
+            block = view[:count * bytes_per_int].cast(format_str)
+            if sys.byteorder != 'little':
+                block = array(format_str, block)
+                block.byteswap()
+            yield block
+            values_read += count
+        
+        pending = filled - usable
+        if pending:
+            view[:pending] = view[usable:filled]
+
+
+def create_engine(engine: str = 'heap',
+                  value_range: Optional[Tuple[int, int]] = None,
+                  epsilon: float = 0.01,
+                  window: int = 1_000_000):
+    """
+    Create a median engine by name.
+    
+    Args:
+        engine: 'heap' (dual heap, any values), 'compact' (dual heap on
+            typed arrays, 32-bit values), 'fenwick' (histogram over
+            a bounded integer range), 'kll' (approximate, bounded memory)
+            'window' (median of the last `window` values) or 'blocked'
+            (sorted array blocks with rank queries)
+        value_range: (min, max) for the fenwick engine; detected if None
+        epsilon: Rank error bound for the kll engine
+        window: Window size for the window engine
+    """
+    if engine == 'heap':
+        return StreamingMedian()
+    if engine == 'compact':
+        return CompactStreamingMedian('i')
+    if engine == 'fenwick':
+        return FenwickMedian(value_range)
+    if engine == 'kll':
+        return KLLSketch(epsilon)
+    if engine == 'window':
+        return SlidingWindowMedian(window)
+    if engine == 'blocked':
+        return BlockedSortedArray()
+    raise ValueError(f"Unknown engine: {engine}")
 
 
 def process_stream(input_stream: BinaryIO, num_values: int, 
-                   report_interval: int = 10_000_000) -> StreamingMedian:
+                   report_interval: int = 10_000_000,
+                   median_calc=None):
     """
     Process binary stream and compute running median.
     
@@ -96,29 +1094,37 @@ def process_stream(input_stream: BinaryIO, num_values: int,
         input_stream: Binary input stream
         num_values: Total number of values to process
         report_interval: How often to report progress
+        median_calc: Median engine to feed (default: new StreamingMedian)
         
     Returns:
-        StreamingMedian object with final state
+        Median engine with final state
     """
-    median_calc = StreamingMedian()
+    if median_calc is None:
+        median_calc = StreamingMedian()
     start_time = time.time()
     
     print(f"Processing {num_values:,} values...")
     print(f"Progress updates every {report_interval:,} values\n")
     
-    for i, value in enumerate(read_binary_stream(input_stream, num_values), 1):
-        median_calc.add_value(value)
-        
-        # Report progress
-        if i % report_interval == 0:
-            elapsed = time.time() - start_time
-            rate = i / elapsed
-            median = median_calc.get_median()
+    i = 0
+    for block in read_binary_blocks(input_stream, num_values):
+        # Split blocks at report boundaries so progress stays exact
+        while len(block):
+            take = min(len(block), report_interval - i % report_interval)
+            median_calc.add_values(block[:take])
+            block = block[take:]
+            i += take
             
-            print(f"Processed: {i:>12,} values | "
-                  f"Median: {median:>12.2f} | "
-                  f"Rate: {rate:>10,.0f} values/sec | "
-                  f"Elapsed: {elapsed:>6.1f}s")
+            # Report progress
+            if i % report_interval == 0:
+                elapsed = time.time() - start_time
+                rate = i / elapsed
+                median = median_calc.get_median()
+                
+                print(f"Processed: {i:>12,} values | "
+                      f"Median: {median:>12.2f} | "
+                      f"Rate: {rate:>10,.0f} values/sec | "
+                      f"Elapsed: {elapsed:>6.1f}s")
     
     elapsed = time.time() - start_time
     final_rate = num_values / elapsed
@@ -129,40 +1135,580 @@ def process_stream(input_stream: BinaryIO, num_values: int,
     print(f"Total time: {elapsed:.2f} seconds")
     print(f"Average rate: {final_rate:,.0f} values/second")
     print(f"Final median: {median_calc.get_median():.2f}")
+    if i:
+        print(f"Engine memory: {median_calc.memory_bytes() / i:.2f} bytes/element")
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"Peak RSS: {peak_rss:,.1f} MiB")
     print(f"{'='*80}\n")
     
     return median_calc
 
 
+def process_keyed_stream(input_stream: BinaryIO, num_records: int,
+                         report_interval: int = 10_000_000,
+                         small_capacity: int = 32) -> KeyedStreamingMedian:
+    """
+    Process a binary stream of (key, value) records ('<ii', 8 bytes each)
+    and keep a running median per key.
+    
+    Args:
+        input_stream: Binary input stream
+        num_records: Total number of records to process
+        report_interval: How often to report progress (in records)
+        small_capacity: Values kept in the shared arena before promotion
+        
+    Returns:
+        KeyedStreamingMedian with final state
+    """
+    keyed = KeyedStreamingMedian(small_capacity)
+    start_time = time.time()
+    
+    print(f"Processing {num_records:,} keyed records...")
+    print(f"Progress updates every {report_interval:,} records\n")
+    
+    carry: List[int] = []  # Key of a record split across blocks
+    for block in read_binary_blocks(input_stream, 2 * num_records):
+        ints = carry + block.tolist() if carry else block.tolist()
+        usable = len(ints) - len(ints) % 2
+        carry = ints[usable:]
+        
+        before = keyed.count
+        keyed.add_records(ints[0:usable:2], ints[1:usable:2])
+        
+        if keyed.count // report_interval > before // report_interval:
+            elapsed = time.time() - start_time
+            print(f"Processed: {keyed.count:>12,} records | "
+                  f"Keys: {len(keyed.keys):>10,} | "
+                  f"Promoted: {len(keyed.promoted):>10,} | "
+                  f"Rate: {keyed.count / elapsed:>10,.0f} records/sec")
+    
+    elapsed = time.time() - start_time
+    query_start = time.time()
+    keys, medians = keyed.medians()
+    query_time = time.time() - query_start
+    
+    print(f"\n{'='*80}")
+    print(f"Processing complete!")
+    print(f"Total records: {keyed.count:,}")
+    print(f"Total time: {elapsed:.2f} seconds")
+    print(f"Average rate: {keyed.count / elapsed if elapsed else 0:,.0f} records/second")
+    print(f"Keys: {len(keys):,} ({len(keyed.promoted):,} promoted to heaps)")
+    if len(keys):
+        print(f"Engine memory: {keyed.memory_bytes() / len(keys):.1f} bytes/key")
+        print(f"Batched median query over all keys: {query_time * 1000:.1f} ms")
+        for key, median in list(zip(keys, medians))[:10]:
+            print(f"  key {key:>10}: median {median:.2f}")
+    print(f"{'='*80}\n")
+    
+    return keyed
+
+
+def _histogram_worker(shm_name: str, worker_id: int, num_workers: int,
+                      value_range: Tuple[int, int], path: Optional[str],
+                      start: int, stop: int, queue) -> None:
+    """
+    Count values into this worker's histogram in shared memory.
+    
+    Reads the byte range [start, stop) of `path`, or raw chunks from
+    `queue` until it receives None. Bin 0 counts values below the range,
+    bin R + 1 values above it.
+    """
+    lo, hi = value_range
+    bins = hi - lo + 3
+    shm = shared_memory.SharedMemory(name=shm_name)
+    hist = shm.buf[8 * bins * worker_id:8 * bins * (worker_id + 1)].cast('q')
+    progress = shm.buf[8 * bins * num_workers:].cast('q')
+    try:
+        base = lo - 1
+        
+        def count(block) -> None:
+            if min(block) >= lo and max(block) <= hi:
+                for value in block:
+                    hist[value - base] += 1
+            else:
+                for value in block:
+                    hist[min(max(value - base, 0), bins - 1)] += 1
+            progress[worker_id] += len(block)
+        
+        if path is not None:
+            with open(path, 'rb') as f:
+                f.seek(start)
+                for block in read_binary_blocks(f, (stop - start) // 4):
+                    count(block)
+        else:
+            for chunk in iter(queue.get, None):
+                block = memoryview(chunk).cast('i')
+                if sys.byteorder != 'little':
+                    block = array('i', block)
+                    block.byteswap()
+                count(block)
+                block.release()
+    finally:
+        # Views into the segment must be released before it can be closed
+        hist.release()
+        progress.release()
+        shm.close()
+
+
+class ShardedHistogramMedian:
+    """
+    Exact cumulative median with N worker processes.
+    
+    Order does not matter for a cumulative median, so each worker counts a
+    shard of the input (a byte range of a file, or round-robin chunks of
+    stdin) into its own int64 histogram in multiprocessing.shared_memory.
+    The coordinator merges the histograms whenever it reports, so workers
+    never synchronize with each other.
+    """
+    
+    def __init__(self, num_workers: int,
+                 value_range: Tuple[int, int] = (-1_000_000, 1_000_000)):
+        self.num_workers = num_workers
+        self.value_range = value_range
+        self.bins = value_range[1] - value_range[0] + 3  # + underflow/overflow
+        size = 8 * (self.bins * num_workers + num_workers)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.shm.buf[:size] = bytes(size)
+        self.processes: List[multiprocessing.Process] = []
+        self.queues: list = []
+        self.feed_error: Optional[BaseException] = None
+    
+    def start_file(self, path: str, num_values: int) -> None:
+        """Split the first num_values integers of path into byte-range shards."""
+        num_values = min(num_values, os.path.getsize(path) // 4)
+        per_worker = -(-num_values // self.num_workers)
+        for worker_id in range(self.num_workers):
+            start = 4 * min(num_values, worker_id * per_worker)
+            stop = 4 * min(num_values, (worker_id + 1) * per_worker)
+            self._spawn(worker_id, path, start, stop, None)
+    
+    def start_queues(self) -> None:
+        """Start workers that consume chunks passed to feed()."""
+        for worker_id in range(self.num_workers):
+            queue = multiprocessing.Queue(maxsize=8)
+            self.queues.append(queue)
+            self._spawn(worker_id, None, 0, 0, queue)
+    
+    def _spawn(self, worker_id, path, start, stop, queue) -> None:
+        process = multiprocessing.Process(
+            target=_histogram_worker,
+            args=(self.shm.name, worker_id, self.num_workers, self.value_range,
+                  path, start, stop, queue),
+            daemon=True)
+        process.start()
+        self.processes.append(process)
+    
+    def feed(self, stream: BinaryIO, num_values: int,
+             chunk_size: int = 1 << 20) -> None:
+        """
+        Distribute chunks of stream to the workers round-robin.
+        
+        Meant to run on a feeder thread: an error (including a dead worker
+        whose queue never drains) is stored in feed_error for check().
+        """
+        try:
+            remaining = 4 * num_values
+            pending = b''
+            turn = 0
+            while remaining > 0:
+                chunk = stream.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                chunk = pending + chunk if pending else chunk
+                usable = len(chunk) - len(chunk) % 4
+                pending = chunk[usable:]
+                self._put(turn, chunk[:usable])
+                turn = (turn + 1) % self.num_workers
+            for worker_id in range(self.num_workers):
+                self._put(worker_id, None)
+        except Exception as e:
+            self.feed_error = e
+    
+    def _put(self, worker_id: int, item, poll: float = 0.5) -> None:
+        """Queue item for a worker, failing instead of blocking if any worker died."""
+        while True:
+            try:
+                self.queues[worker_id].put(item, timeout=poll)
+                return
+            except Full:
+                self.check()
+    
+    def processed(self) -> int:
+        """Values counted so far by all workers."""
+        progress = self.shm.buf[8 * self.bins * self.num_workers:].cast('q')
+        try:
+            return sum(progress)
+        finally:
+            progress.release()
+    
+    def merged_histogram(self) -> array:
+        """Sum of all worker histograms (a consistent-enough snapshot)."""
+        buf = self.shm.buf
+        merged = array('q', buf[:8 * self.bins].cast('q'))
+        for worker_id in range(1, self.num_workers):
+            view = buf[8 * self.bins * worker_id:8 * self.bins * (worker_id + 1)].cast('q')
+            merged = array('q', map(add, merged, view))
+            view.release()
+        return merged
+    
+    def median(self) -> Tuple[float, int]:
+        """Exact median of everything counted so far, and that count."""
+        merged = self.merged_histogram()
+        prefix = list(accumulate(merged))
+        total = prefix[-1]
+        if not total:
+            raise ValueError("No values added yet")
+        
+        def select(k: int) -> int:  # 1-based rank
+            idx = bisect.bisect_left(prefix, k)
+            if idx == 0 or idx == self.bins - 1:
+                raise ValueError("Median lies outside the configured value range")
+            return self.value_range[0] + idx - 1
+        
+        half = (total + 1) // 2
+        if total & 1:
+            return float(select(half)), total
+        return (select(half) + select(half + 1)) / 2.0, total
+    
+    def alive(self) -> bool:
+        return any(process.is_alive() for process in self.processes)
+    
+    def check(self) -> None:
+        """Raise RuntimeError if a worker exited abnormally or feeding failed."""
+        for worker_id, process in enumerate(self.processes):
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(f"Histogram worker {worker_id} exited with "
+                                   f"code {process.exitcode}; result would be partial")
+        if self.feed_error is not None:
+            raise RuntimeError(f"Feeding workers failed: {self.feed_error}")
+    
+    def close(self, terminate: bool = False) -> None:
+        """Join the workers (terminating them after a failure) and free the segment."""
+        for queue in self.queues:
+            if terminate:
+                queue.cancel_join_thread()  # Undelivered chunks are dropped
+        for process in self.processes:
+            if terminate and process.is_alive():
+                process.terminate()
+            process.join()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def process_sharded(path: Optional[str], num_values: int, num_workers: int,
+                    value_range: Tuple[int, int] = (-1_000_000, 1_000_000),
+                    report_interval: int = 10_000_000,
+                    verbose: bool = True) -> Tuple[float, int, float]:
+    """
+    Compute the exact median with num_workers processes.
+    
+    Args:
+        path: Input file, or None to read stdin
+        num_values: Number of integers to process
+        num_workers: Worker processes
+        value_range: (min, max) histogram range
+        report_interval: Merge and report every N values (approximately,
+            as workers progress independently)
+        verbose: Print progress and summary
+        
+    Returns:
+        (median, values processed, elapsed seconds)
+    """
+    sharded = ShardedHistogramMedian(num_workers, value_range)
+    start_time = time.time()
+    completed = False
+    try:
+        if path is not None:
+            sharded.start_file(path, num_values)
+        else:
+            sharded.start_queues()
+            feeder = threading.Thread(target=sharded.feed,
+                                      args=(sys.stdin.buffer, num_values), daemon=True)
+            feeder.start()
+        
+        next_report = report_interval
+        while sharded.alive():
+            time.sleep(0.05)
+            sharded.check()
+            if sharded.processed() >= next_report:
+                median, total = sharded.median()
+                elapsed = time.time() - start_time
+                if verbose:
+                    print(f"Processed: {total:>12,} values | "
+                          f"Median: {median:>12.2f} | "
+                          f"Rate: {total / elapsed:>10,.0f} values/sec | "
+                          f"Elapsed: {elapsed:>6.1f}s")
+                next_report = (total // report_interval + 1) * report_interval
+        
+        sharded.check()
+        median, total = sharded.median()
+        elapsed = time.time() - start_time
+        completed = True
+    finally:
+        sharded.close(terminate=not completed)
+    
+    if verbose:
+        print(f"\n{'='*80}")
+        print(f"Sharded processing complete ({num_workers} workers)")
+        print(f"Total values: {total:,}")
+        print(f"Total time: {elapsed:.2f} seconds")
+        print(f"Average rate: {total / elapsed:,.0f} values/second")
+        print(f"Final median: {median:.2f}")
+        print(f"{'='*80}\n")
+    return median, total, elapsed
+
+
+def benchmark_sharded(path: str, num_values: int,
+                      max_workers: Optional[int] = None,
+                      value_range: Tuple[int, int] = (-1_000_000, 1_000_000)) -> None:
+    """Measure scaling of process_sharded for 1, 2, 4, ... workers."""
+    # CPUs this process may run on (cgroup/affinity limits), not installed ones
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    max_workers = max_workers or cpus or 1
+    counts = sorted({1 << e for e in range(max_workers.bit_length())} | {max_workers})
+    print(f"CPUs available: {cpus}")
+    print(f"{'Workers':>8} | {'Time (s)':>9} | {'values/sec':>14} | {'Speedup':>8}")
+    print("-" * 50)
+    
+    baseline = None
+    for workers in counts:
+        _, total, elapsed = process_sharded(path, num_values, workers, value_range,
+                                            verbose=False)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} | {elapsed:>9.2f} | {total / elapsed:>14,.0f} | "
+              f"{baseline / elapsed:>7.2f}x")
+
+
+def benchmark_window(windows: Sequence[int] = (10**3, 10**4, 10**5, 10**6, 10**7),
+                     num_ops: int = 200_000, seed: int = 42) -> None:
+    """
+    Benchmark SlidingWindowMedian for several window sizes.
+    
+    The window is first filled with W random values (bulk load), then
+    num_ops steady-state steps (insert + evict + median query) are timed.
+    """
+    rng = random.Random(seed)
+    print(f"{'Window':>12} | {'Fill (s)':>9} | {'us/step':>8} | {'steps/sec':>12}")
+    print("-" * 52)
+    
+    for window in windows:
+        engine = SlidingWindowMedian(window)
+        fill = [rng.randint(-1_000_000, 1_000_000) for _ in range(window)]
+        steps = [rng.randint(-1_000_000, 1_000_000) for _ in range(num_ops)]
+        
+        start = time.perf_counter()
+        engine.add_values(fill)
+        fill_time = time.perf_counter() - start
+        del fill
+        
+        add_value, get_median = engine.add_value, engine.get_median
+        start = time.perf_counter()
+        for value in steps:
+            add_value(value)
+            get_median()
+        elapsed = time.perf_counter() - start
+        
+        print(f"{window:>12,} | {fill_time:>9.2f} | "
+              f"{elapsed / num_ops * 1e6:>8.2f} | {num_ops / elapsed:>12,.0f}")
+
+
+DISTRIBUTIONS = ('uniform', 'normal', 'sorted', 'alternating', 'duplicates')
+_NIBBLE = bytes(i & 15 for i in range(256))  # Byte -> index into 16 duplicates
+
+
+def _wrapped_range(start: int, stop: int, modulus: int, base: int,
+                   sign: int = 1) -> array:
+    """base + sign * (i % modulus) for i in range(start, stop), built from C-level ranges."""
+    out = array('q')
+    while start < stop:
+        end = min(stop, (start // modulus + 1) * modulus)
+        first = base + sign * (start % modulus)
+        out.extend(range(first, first + sign * (end - start), sign))
+        start = end
+    return out
+
+
+def generate_blocks(count: int, format_str: str = 'i',
+                    distribution: str = 'uniform', seed: int = 0,
+                    value_range: Tuple[int, int] = (-1_000_000, 1_000_000),
+                    block_size: int = 1 << 20) -> Iterator[array]:
+    """
+    Generate reproducible blocks of test integers without per-value Python calls.
+    
+    Random bits come only from a seeded random.Random(seed).randbytes(), so a
+    seed gives the same stream on every machine, and are mapped to the value
+    range with C-level map() chains over typed arrays.
+    
+    Distributions:
+        uniform      - uniform over value_range
+        normal       - bell curve around the range centre (sigma = span / 8)
+        sorted       - globally ascending
+        alternating  - lo, hi, lo+1, hi-1, ...: every value lands on the
+                       opposite side of the median (worst case for heaps)
+        duplicates   - only 16 distinct values
+    
+    Yields:
+        array(format_str) blocks of up to block_size values
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    lo, hi = value_range
+    span = hi - lo + 1
+    rng = random.Random(seed)
+    block_size -= block_size % 2  # Keeps alternating pairs aligned
+    num_blocks = max(1, -(-count // block_size))
+    
+    for start in range(0, count, block_size):
+        n = min(block_size, count - start)
+        
+        if distribution == 'uniform':
+            raw = array('Q', rng.randbytes(8 * n))
+            values = array(format_str, map(lo.__add__, map(span.__rmod__, raw)))
+        
+        elif distribution == 'normal':
+            sigma = span / 8
+            # Irwin-Hall: the sum of 4 uniform 16-bit words is close to normal
+            total = array('H', rng.randbytes(2 * n))
+            for _ in range(3):
+                total = map(add, total, array('H', rng.randbytes(2 * n)))
+            scale = sigma / math.sqrt(4 * (65536 ** 2 - 1) / 12)
+            shift = lo + span / 2 - 4 * 32767.5 * scale
+            values = array(format_str, map(int, map(shift.__add__, map(scale.__mul__, total))))
+        
+        elif distribution == 'sorted':
+            # Block k draws from the k-th slice of the range, then sorts
+            k = start // block_size
+            sub_lo = lo + span * k // num_blocks
+            sub_span = max(1, span * (k + 1) // num_blocks - span * k // num_blocks)
+            raw = array('Q', rng.randbytes(8 * n))
+            values = array(format_str, sorted(map(sub_lo.__add__, map(sub_span.__rmod__, raw))))
+        
+        elif distribution == 'alternating':
+            half = max(1, span // 2)
+            pair_start = start // 2
+            pair_stop = pair_start + (n + 1) // 2
+            values = array(format_str, bytes(n * struct.calcsize(format_str)))
+            values[0::2] = array(format_str, _wrapped_range(pair_start, pair_stop, half, lo))
+            values[1::2] = array(format_str, _wrapped_range(pair_start, pair_start + n // 2,
+                                                            half, hi, -1))
+        
+        else:  # duplicates
+            table = array(format_str, (lo + span * j // 16 for j in range(16)))
+            values = array(format_str, map(table.__getitem__,
+                                           rng.randbytes(n).translate(_NIBBLE)))
+        
+        yield values
+
+
 def generate_test_stream(filename: str, num_values: int, 
-                        value_range: tuple = (-1_000_000, 1_000_000)) -> None:
+                        value_range: tuple = (-1_000_000, 1_000_000),
+                        distribution: str = 'uniform',
+                        seed: int = 0) -> None:
     """
-    Generate a binary test stream file.
+    Generate a binary test stream file (little-endian int32).
     
     Args:
         filename: Output filename
         num_values: Number of values to generate
         value_range: (min, max) range for random values
+        distribution: One of DISTRIBUTIONS
+        seed: Seed for reproducible output
     """
-    import random
-    
     print(f"Generating test stream: {filename}")
-    print(f"Values: {num_values:,}, Range: {value_range}\n")
+    print(f"Values: {num_values:,}, Range: {value_range}, "
+          f"Distribution: {distribution}, Seed: {seed}\n")
     
+    generated = 0
     with open(filename, 'wb') as f:
-        chunk_size = 100_000
-        for i in range(0, num_values, chunk_size):
-            batch_size = min(chunk_size, num_values - i)
-            values = [random.randint(*value_range) for _ in range(batch_size)]
-            data = struct.pack(f'<{batch_size}i', *values)
-            f.write(data)
+        for block in generate_blocks(num_values, 'i', distribution, seed, value_range):
+            if sys.byteorder != 'little':
+                block.byteswap()
+            f.write(block)  # One write per block
+            generated += len(block)
             
-            if (i + batch_size) % 10_000_000 == 0:
-                print(f"Generated {i + batch_size:,} values...")
+            if generated % 10_000_000 < len(block):
+                print(f"Generated {generated:,} values...")
     
     print(f"Test stream generated successfully!\n")
 
 
+def generate_keyed_stream(filename: str, num_records: int, num_keys: int,
+                          seed: int = 0) -> None:
+    """
+    Generate a binary stream of (key, value) records ('<ii').
+    
+    Args:
+        filename: Output filename
+        num_records: Number of records to generate
+        num_keys: Keys are drawn uniformly from [0, num_keys)
+        seed: Seed for reproducible output
+    """
+    print(f"Generating keyed stream: {filename}")
+    print(f"Records: {num_records:,}, Keys: {num_keys:,}, Seed: {seed}\n")
+    
+    rng = random.Random(seed + 1)  # Independent of the value stream
+    with open(filename, 'wb') as f:
+        for values in generate_blocks(num_records, 'i', 'uniform', seed):
+            n = len(values)
+            keys = array('i', map(num_keys.__rmod__, array('I', rng.randbytes(4 * n))))
+            records = array('i', bytes(8 * n))
+            records[0::2] = keys
+            records[1::2] = values
+            if sys.byteorder != 'little':
+                records.byteswap()
+            f.write(records)
+    
+    print(f"Keyed stream generated successfully!\n")
+
+
+ENGINES = ('heap', 'compact', 'fenwick', 'kll', 'window', 'blocked')
+
+
+def pop_option(name: str, default: str) -> str:
+    """Remove '<name> <value>' from sys.argv and return value (or default)."""
+    if name not in sys.argv:
+        return default
+    idx = sys.argv.index(name)
+    if idx + 1 >= len(sys.argv):
+        print(f"{name} requires a value")
+        sys.exit(1)
+    value = sys.argv[idx + 1]
+    del sys.argv[idx:idx + 2]
+    return value
+
+
+def print_engine_summary(result) -> None:
+    """Print engine-specific state after processing."""
+    if isinstance(result, StreamingMedian):
+        print(f"Heap sizes: max_heap={len(result.max_heap):,}, "
+              f"min_heap={len(result.min_heap):,}")
+    elif isinstance(result, CompactStreamingMedian):
+        print(f"Heap sizes: lower={len(result.lower):,}, "
+              f"upper={len(result.upper):,} "
+              f"({result.lower.data.itemsize} bytes/slot)")
+    elif isinstance(result, FenwickMedian):
+        print(f"Histogram bins: {result.size:,}")
+    elif isinstance(result, SlidingWindowMedian):
+        print(f"Window: {len(result.recent):,} of {result.window:,} values "
+              f"in {len(result.sorted.blocks):,} blocks")
+    elif isinstance(result, BlockedSortedArray):
+        n = len(result)
+        print(f"Blocks: {len(result.blocks):,} (load {result.load})")
+        print("Rank queries: " + ", ".join(
+            f"p{q * 100:g}={result.select(min(n - 1, int(q * n))):,}"
+            for q in (0.01, 0.25, 0.75, 0.99)))
+        print(f"Values <= 0: {result.rank(0):,} of {n:,}")
+    elif isinstance(result, KLLSketch):
+        print(f"Sketch: k={result.k}, retained={result.retained():,} items, "
+              f"rank error <= {result.epsilon:.2%}")
+        for q, estimate, low, high in result.quantiles_with_bounds():
+            print(f"  p{q * 100:<5g} {estimate:>14.2f}   "
+                  f"[{low:.2f}, {high:.2f}]")
+
+
 def main():
     """Main entry point with example usage."""
     
@@ -170,27 +1716,100 @@ def main():
     NUM_VALUES = 100_000_000  # 10^8 values
     TEST_FILE = '/tmp/test_stream.bin'
     
+    VALUE_RANGE = (-1_000_000, 1_000_000)
+    
+    # Engine options may appear anywhere:
+    # --engine heap|compact|fenwick|kll|window|blocked, --epsilon E, --window W
+    engine = pop_option('--engine', 'heap')
+    if engine not in ENGINES:
+        print(f"--engine must be one of: {', '.join(ENGINES)}")
+        sys.exit(1)
+    epsilon = float(pop_option('--epsilon', '0.01'))
+    window = int(pop_option('--window', '1000000'))
+    distribution = pop_option('--distribution', 'uniform')
+    if distribution not in DISTRIBUTIONS:
+        print(f"--distribution must be one of: {', '.join(DISTRIBUTIONS)}")
+        sys.exit(1)
+    seed = int(pop_option('--seed', '0'))
+    lo, _, hi = pop_option('--range', f"{VALUE_RANGE[0]}:{VALUE_RANGE[1]}").partition(':')
+    value_range = (int(lo), int(hi))
+    
     print("=" * 80)
     print("STREAMING MEDIAN CALCULATOR")
     print("=" * 80)
     print()
     
+    # Multi-process exact median over a bounded range
+    if len(sys.argv) > 1 and sys.argv[1] == '--sharded':
+        if len(sys.argv) < 3:
+            print("Usage: python streaming_median.py --sharded <file|-> [workers] [num_values]")
+            sys.exit(1)
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+        num_values = int(sys.argv[4]) if len(sys.argv) > 4 else NUM_VALUES
+        path = None if sys.argv[2] == '-' else sys.argv[2]
+        print(f"Mode: Sharded histogram median, {workers} workers, range {value_range}\n")
+        try:
+            process_sharded(path, num_values, workers, value_range)
+        except ValueError as e:
+            print(f"Error: {e} (widen it with --range MIN:MAX)")
+            sys.exit(1)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
+    elif len(sys.argv) > 1 and sys.argv[1] == '--bench-sharded':
+        if len(sys.argv) < 3:
+            print("Usage: python streaming_median.py --bench-sharded <file> [max_workers] [num_values]")
+            sys.exit(1)
+        max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        num_values = int(sys.argv[4]) if len(sys.argv) > 4 else NUM_VALUES
+        print("Mode: Sharded histogram scaling benchmark\n")
+        benchmark_sharded(sys.argv[2], num_values, max_workers, value_range)
+    
+    # Keyed records: one running median per key
+    elif len(sys.argv) > 1 and sys.argv[1] == '--generate-keyed':
+        if len(sys.argv) < 4:
+            print("Usage: python streaming_median.py --generate-keyed <file> <records> [keys]")
+            sys.exit(1)
+        num_keys = int(sys.argv[4]) if len(sys.argv) > 4 else 100_000
+        generate_keyed_stream(sys.argv[2], int(sys.argv[3]), num_keys, seed)
+    
+    elif len(sys.argv) > 1 and sys.argv[1] == '--keyed':
+        if len(sys.argv) < 3:
+            print("Usage: python streaming_median.py --keyed <file|-> [num_records]")
+            sys.exit(1)
+        num_records = int(sys.argv[3]) if len(sys.argv) > 3 else NUM_VALUES
+        print(f"Mode: Keyed running medians from {sys.argv[2]}\n")
+        if sys.argv[2] == '-':
+            process_keyed_stream(sys.stdin.buffer, num_records)
+        else:
+            with open(sys.argv[2], 'rb') as f:
+                process_keyed_stream(f, num_records)
+    
+    # Sliding-window benchmark for W = 10^3 .. 10^max_exp
+    elif len(sys.argv) > 1 and sys.argv[1] == '--bench-window':
+        max_exp = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+        print("Mode: Sliding-window median benchmark\n")
+        benchmark_window([10**e for e in range(3, max_exp + 1)])
+    
     # Option 1: Generate and process test data
-    if len(sys.argv) == 1 or sys.argv[1] == '--test':
-        print("Mode: Generate test data and process\n")
-        generate_test_stream(TEST_FILE, NUM_VALUES)
+    elif len(sys.argv) == 1 or sys.argv[1] == '--test':
+        print(f"Mode: Generate test data and process (engine: {engine})\n")
+        generate_test_stream(TEST_FILE, NUM_VALUES, VALUE_RANGE, distribution, seed)
         
         with open(TEST_FILE, 'rb') as f:
-            result = process_stream(f, NUM_VALUES)
+            median_calc = create_engine(engine, VALUE_RANGE, epsilon, window)
+            result = process_stream(f, NUM_VALUES, median_calc=median_calc)
         
-        print(f"Heap sizes: max_heap={len(result.max_heap):,}, "
-              f"min_heap={len(result.min_heap):,}")
+        print_engine_summary(result)
         
     # Option 2: Process from stdin
     elif sys.argv[1] == '--stdin':
         num_values = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_VALUES
-        print(f"Mode: Reading {num_values:,} values from stdin\n")
-        result = process_stream(sys.stdin.buffer, num_values)
+        print(f"Mode: Reading {num_values:,} values from stdin (engine: {engine})\n")
+        median_calc = create_engine(engine, epsilon=epsilon, window=window)
+        result = process_stream(sys.stdin.buffer, num_values, median_calc=median_calc)
+        print_engine_summary(result)
     
     # Option 3: Process from file
     elif sys.argv[1] == '--file':
@@ -200,18 +1819,37 @@ def main():
         
         filename = sys.argv[2]
         num_values = int(sys.argv[3]) if len(sys.argv) > 3 else NUM_VALUES
-        print(f"Mode: Reading {num_values:,} values from {filename}\n")
+        print(f"Mode: Reading {num_values:,} values from {filename} (engine: {engine})\n")
         
         with open(filename, 'rb') as f:
-            result = process_stream(f, num_values)
+            median_calc = create_engine(engine, epsilon=epsilon, window=window)
+            result = process_stream(f, num_values, median_calc=median_calc)
+        print_engine_summary(result)
     
     else:
         print("Usage:")
         print("  python streaming_median.py [--test]              # Generate and process test data")
         print("  python streaming_median.py --stdin [num_values]  # Read from stdin")
         print("  python streaming_median.py --file <file> [num]   # Read from file")
+        print("  Add --engine compact for typed-array heaps (less memory),")
+        print("  --engine fenwick for the bounded-range histogram engine,")
+        print("  --engine kll [--epsilon 0.01] for bounded-memory quantiles,")
+        print("  --engine window [--window W] for the median of the last W values,")
+        print("  or --engine blocked for sorted array blocks with rank queries")
+        print("  Test data: --distribution uniform|normal|sorted|alternating|duplicates, --seed N")
+        print("  python streaming_median.py --bench-window [max_exp]  # Window benchmark")
+        print("  python streaming_median.py --sharded <file|-> [workers] [num]  # Multi-core")
+        print("  python streaming_median.py --bench-sharded <file> [max_workers] [num]")
+        print("  Histogram range for sharded mode: --range MIN:MAX (default -1000000:1000000)")
+        print("  python streaming_median.py --generate-keyed <file> <records> [keys]")
+        print("  python streaming_median.py --keyed <file|-> [records]  # Median per key")
         sys.exit(1)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    try:
+        main()
+    except RangeExceededError as e:
+        # Detected ranges can outgrow max_range after partial output
+        print(f"\nError: {e}")
+        sys.exit(1)
\ No newline at end of file
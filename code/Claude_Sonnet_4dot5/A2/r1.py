@@ -2,30 +2,868 @@
 """
 File System Monitor
 Monitors a directory for file system changes and logs them with timestamps.
-Uses event-driven approach (no polling) via the watchdog library.
+Uses event-driven approach (no polling) via the watchdog library, or a
+native inotify backend on Linux.
 """
 
+from __future__ import annotations  # FileSystemEvent is only a type hint
+
+import bisect
+import ctypes
+import ctypes.util
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import hashlib
+import heapq
+import json
+import os
+import select
+import socket
+import sqlite3
+import stat
+import struct
 import sys
+import threading
 import time
 import logging
+from collections import OrderedDict, deque
 from datetime import datetime
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from typing import List, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler, FileSystemEvent
+except ImportError:  # only the native inotify backend is available
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class EventCoalescer:
+    """
+    Per-path debouncing stage between the event handler and the logger.
+    
+    Events for a path are held until no new event has arrived for `window`
+    seconds (but at most `max_delay` seconds after the first one) and are
+    then emitted as a single event:
+    
+        CREATED + MODIFIED...            -> CREATED
+        MODIFIED + MODIFIED...           -> MODIFIED
+        MODIFIED... + DELETED            -> DELETED
+        DELETED + CREATED (+ MODIFIED)   -> MODIFIED
+        CREATED + ... + DELETED          -> nothing (transient file)
+    """
+    
+    def __init__(self, emit, window: float = 0.05, max_delay: float = None):
+        """
+        Initialize the coalescer.
+        
+        Args:
+            emit: Callback emit(kind, path, is_directory, folded) receiving
+                the merged event and the number of raw events it replaces
+            window: Quiet period per path in seconds
+            max_delay: Upper bound on how long an event is held
+                (default: 20 windows)
+        """
+        self.emit = emit
+        self.window = window
+        self.max_delay = max_delay if max_delay is not None else 20 * window
+        self.pending = {}   # path -> [kind, is_directory, count, first_seen, deadline]
+        self.schedule = []  # heap of (deadline, path); stale entries are skipped
+        self.raw_events = 0
+        self.emitted = 0
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='event-coalescer', daemon=True)
+        self.thread.start()
+    
+    def submit(self, kind: str, path: str, is_directory: bool):
+        """Add a raw CREATED, MODIFIED or DELETED event."""
+        now = time.monotonic()
+        with self.condition:
+            self.raw_events += 1
+            entry = self.pending.get(path)
+            if entry is None:
+                deadline = now + self.window
+                self.pending[path] = [kind, is_directory, 1, now, deadline]
+            else:
+                entry[0] = self._fold(entry[0], kind)
+                entry[2] += 1
+                deadline = entry[4] = min(now + self.window, entry[3] + self.max_delay)
+            heapq.heappush(self.schedule, (deadline, path))
+            self.condition.notify()
+    
+    def flush_path(self, path: str):
+        """Emit whatever is pending for path now (used before moves)."""
+        with self.condition:
+            entry = self.pending.pop(path, None)
+        if entry is not None:
+            self._emit(path, entry)
+    
+    def close(self):
+        """Stop the worker and emit everything still pending."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+        for path, entry in list(self.pending.items()):
+            self._emit(path, entry)
+        self.pending.clear()
+    
+    @staticmethod
+    def _fold(previous, kind: str):
+        """Merge a new event into the pending one."""
+        if previous is None:                      # earlier create+delete cancelled out
+            return 'CREATED' if kind != 'DELETED' else None
+        if kind == 'DELETED':
+            return None if previous == 'CREATED' else 'DELETED'
+        if previous == 'DELETED':                 # replaced in place
+            return 'MODIFIED'
+        return previous                           # CREATED/MODIFIED absorb MODIFIED
+    
+    def _emit(self, path: str, entry):
+        kind, is_directory, count = entry[0], entry[1], entry[2]
+        if kind is not None:
+            self.emitted += 1
+            self.emit(kind, path, is_directory, count)
+    
+    def _run(self):
+        """Emit entries whose deadline has passed."""
+        while True:
+            due = []
+            with self.condition:
+                while self.running and not self.schedule:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                now = time.monotonic()
+                while self.schedule and self.schedule[0][0] <= now:
+                    deadline, path = heapq.heappop(self.schedule)
+                    entry = self.pending.get(path)
+                    if entry is not None and entry[4] == deadline:
+                        due.append((path, self.pending.pop(path)))
+                if not due and self.schedule:
+                    self.condition.wait(self.schedule[0][0] - now)
+            for path, entry in due:
+                self._emit(path, entry)
+
+
+class EventJournal:
+    """
+    Append-only binary event journal with a sparse time index.
+    
+    Three files share a base name:
+    
+        <journal>        records: u16 length + (f64 time, u32 path id,
+                         u32 dest id, u8 kind, u8 is_dir, u32 folded)
+        <journal>.paths  path dictionary: u32 length + UTF-8 path, the
+                         n-th entry has id n
+        <journal>.idx    (f64 time, u64 offset) of every index_every-th record
+    
+    Paths are written before any record that refers to them, so a journal
+    cut off by a crash stays readable; a torn last record is dropped when
+    the journal is reopened. Record times never decrease (a time earlier
+    than the previous record's is raised to it), which the index and
+    JournalReader.query rely on.
+    """
+    
+    KINDS = ('CREATED', 'MODIFIED', 'DELETED', 'MOVED')
+    NO_PATH = 0xFFFFFFFF
+    RECORD = struct.Struct('<HdIIBBI')
+    BODY_SIZE = RECORD.size - 2
+    PATH_HEADER = struct.Struct('<I')
+    INDEX_ENTRY = struct.Struct('<dQ')
+    
+    def __init__(self, path: str, index_every: int = 1024, flush_bytes: int = 1 << 16):
+        """
+        Open (or create) a journal for appending.
+        
+        Args:
+            path: Journal base file name
+            index_every: Write an index entry every N records
+            flush_bytes: Buffered record bytes that trigger a write
+        """
+        self.path = path
+        self.index_every = index_every
+        self.flush_bytes = flush_bytes
+        self.lock = threading.Lock()
+        self.path_ids = {p: i for i, p in enumerate(self.read_paths(path))}
+        self.records = 0
+        self.last_time = 0.0
+        self.since_index = self._recover()
+        self.data = open(path, 'ab')
+        self.paths = open(path + '.paths', 'ab')
+        self.index = open(path + '.idx', 'ab')
+        self.offset = self.data.tell()
+        self.data_buffer = bytearray()
+        self.path_buffer = bytearray()
+        self.index_buffer = bytearray()
+    
+    def _recover(self) -> int:
+        """
+        Drop a torn tail, count records written since the last index entry
+        and remember the last record's time.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        index = JournalReader.read_index(self.path)
+        offset = int(index[-1][1]) if index else 0
+        with open(self.path, 'r+b') as f:
+            f.seek(offset)
+            tail = f.read()
+            count, pos = 0, 0
+            while pos + self.RECORD.size <= len(tail):
+                length = int.from_bytes(tail[pos:pos + 2], 'little')
+                if pos + 2 + length > len(tail):
+                    break
+                self.last_time = self.RECORD.unpack_from(tail, pos)[1]
+                pos += 2 + length
+                count += 1
+            if pos < len(tail):
+                f.truncate(offset + pos)
+        return count
+    
+    @staticmethod
+    def read_paths(path: str) -> List[str]:
+        """Load the path dictionary of a journal."""
+        paths = []
+        try:
+            with open(path + '.paths', 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return paths
+        pos, header = 0, EventJournal.PATH_HEADER
+        while pos + header.size <= len(data):
+            (length,) = header.unpack_from(data, pos)
+            pos += header.size
+            if pos + length > len(data):
+                break  # torn entry; no record can refer to it
+            paths.append(data[pos:pos + length].decode('utf-8', 'surrogateescape'))
+            pos += length
+        return paths
+    
+    def _path_id(self, path: str) -> int:
+        path_id = self.path_ids.get(path)
+        if path_id is None:
+            path_id = self.path_ids[path] = len(self.path_ids)
+            encoded = path.encode('utf-8', 'surrogateescape')
+            self.path_buffer += self.PATH_HEADER.pack(len(encoded))
+            self.path_buffer += encoded
+        return path_id
+    
+    def append(self, kind: str, path: str, is_directory: bool, folded: int = 1,
+               dest_path: str = None, timestamp: float = None):
+        """Append one event record."""
+        with self.lock:
+            # Stamped under the lock so records from several threads stay in order
+            timestamp = max(time.time() if timestamp is None else timestamp, self.last_time)
+            self.last_time = timestamp
+            dest_id = self._path_id(dest_path) if dest_path else self.NO_PATH
+            record = self.RECORD.pack(self.BODY_SIZE, timestamp, self._path_id(path), dest_id,
+                                      self.KINDS.index(kind), is_directory, folded)
+            if self.since_index == 0 or self.since_index >= self.index_every:
+                self.index_buffer += self.INDEX_ENTRY.pack(timestamp, self.offset)
+                self.since_index = 0
+            self.data_buffer += record
+            self.offset += len(record)
+            self.since_index += 1
+            self.records += 1
+            if len(self.data_buffer) >= self.flush_bytes:
+                self._flush()
+    
+    def flush(self):
+        """Write buffered records (paths first, index last)."""
+        with self.lock:
+            self._flush()
+    
+    def _flush(self):
+        for f, buffer in ((self.paths, self.path_buffer), (self.data, self.data_buffer),
+                          (self.index, self.index_buffer)):
+            if buffer:
+                f.write(buffer)
+                f.flush()
+                buffer.clear()
+    
+    def close(self):
+        with self.lock:
+            self._flush()
+            for f in (self.paths, self.data, self.index):
+                f.close()
+
+
+class JournalReader:
+    """Time-range queries over an EventJournal using its sparse index."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.paths = EventJournal.read_paths(path)
+        self.index = self.read_index(path)
+    
+    @staticmethod
+    def read_index(path: str) -> List[Tuple[float, int]]:
+        try:
+            with open(path + '.idx', 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        entry = EventJournal.INDEX_ENTRY
+        usable = len(data) - len(data) % entry.size
+        return list(entry.iter_unpack(data[:usable]))
+    
+    def query(self, since: float = None, until: float = None, prefix: str = None,
+              chunk_size: int = 1 << 20):
+        """
+        Yield (time, kind, path, dest_path, is_directory, folded) for
+        records with since <= time <= until under an optional path prefix
+        (a path and everything below it: 'src/a' matches 'src/a/x' but not
+        'src/abc').
+        
+        Seeks to the last index entry at or before `since` and stops at the
+        first record after `until`, so only the requested range is read.
+        """
+        offset = 0
+        if since is not None and self.index:
+            times = [t for t, _ in self.index]
+            i = bisect.bisect_right(times, since) - 1
+            offset = self.index[i][1] if i >= 0 else 0
+        
+        wanted = None
+        if prefix:
+            prefix = prefix.rstrip(os.sep)
+            below = prefix + os.sep
+            wanted = {i for i, p in enumerate(self.paths) if p == prefix or p.startswith(below)}
+        
+        record = EventJournal.RECORD
+        kinds, paths = EventJournal.KINDS, self.paths
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            pending = b''
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                data = pending + chunk
+                pos = 0
+                while pos + record.size <= len(data):
+                    length = int.from_bytes(data[pos:pos + 2], 'little')
+                    if pos + 2 + length > len(data):
+                        break
+                    _, timestamp, path_id, dest_id, kind, is_dir, folded = record.unpack_from(data, pos)
+                    pos += 2 + length
+                    if until is not None and timestamp > until:
+                        return
+                    if since is not None and timestamp < since:
+                        continue
+                    if wanted is not None and path_id not in wanted and dest_id not in wanted:
+                        continue
+                    dest = paths[dest_id] if dest_id != EventJournal.NO_PATH else None
+                    yield timestamp, kinds[kind], paths[path_id], dest, bool(is_dir), folded
+                pending = data[pos:]
+
+
+def parse_time(text: str) -> float:
+    """Parse 'YYYY-MM-DD HH:MM[:SS]', or 'HH:MM[:SS]' for today, into epoch seconds."""
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        clock = datetime.strptime(text, '%H:%M:%S' if text.count(':') == 2 else '%H:%M')
+        return datetime.now().replace(hour=clock.hour, minute=clock.minute,
+                                      second=clock.second, microsecond=0).timestamp()
+
+
+def query_journal(path: str, since: str = None, until: str = None, prefix: str = None):
+    """Print journal events in a time range (the --query command)."""
+    reader = JournalReader(path)
+    count = 0
+    for timestamp, kind, src, dest, is_directory, folded in reader.query(
+            parse_time(since) if since else None, parse_time(until) if until else None,
+            os.path.abspath(prefix) if prefix else None):
+        stamp = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        item = "DIRECTORY" if is_directory else "FILE"
+        target = f"{src} -> {dest}" if dest else src
+        suffix = f" ({folded} events folded)" if folded > 1 else ""
+        print(f"{stamp} - {item} {kind}: {target}{suffix}")
+        count += 1
+    print(f"{count} events", file=sys.stderr)
+
+
+class Subscriber:
+    """
+    One fan-out client: its filter, a bounded queue and a sender thread.
+    
+    With policy 'drop-oldest' the queue is a ring of frames; with
+    'coalesce' it keeps only the latest frame per path. Either way a full
+    queue discards instead of blocking the publisher, and the number of
+    discarded events is sent to the client as a DROPPED frame.
+    """
+    
+    POLICIES = ('drop-oldest', 'coalesce')
+    
+    def __init__(self, conn: socket.socket, prefixes: Tuple[str, ...], kinds: frozenset,
+                 policy: str, max_queue: int, on_close):
+        self.conn = conn
+        # A prefix covers that path and everything below it ('src/a' is not 'src/abc')
+        self.prefixes = tuple(prefix.rstrip(os.sep) for prefix in prefixes)
+        self.below = tuple(prefix + os.sep for prefix in self.prefixes)
+        self.kinds = kinds
+        self.policy = policy
+        self.max_queue = max_queue
+        self.on_close = on_close
+        self.queue = OrderedDict() if policy == 'coalesce' else deque(maxlen=max_queue)
+        self.dropped = 0
+        self.condition = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='fanout-sender', daemon=True)
+        self.thread.start()
+    
+    def wants(self, kind: str, path: str) -> bool:
+        return (not self.kinds or kind in self.kinds) and (
+            not self.prefixes or path.startswith(self.below) or path in self.prefixes)
+    
+    def put(self, path: str, frame: bytes):
+        with self.condition:
+            queue = self.queue
+            if self.policy == 'coalesce':
+                if path in queue:
+                    queue.move_to_end(path)  # superseded, not lost
+                elif len(queue) >= self.max_queue:
+                    queue.popitem(last=False)
+                    self.dropped += 1
+                queue[path] = frame
+            else:
+                if len(queue) == self.max_queue:
+                    self.dropped += 1  # deque(maxlen) discards the oldest
+                queue.append(frame)
+            self.condition.notify()
+    
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+    
+    def _run(self):
+        try:
+            while True:
+                with self.condition:
+                    while not self.queue and not self.closed:
+                        self.condition.wait()
+                    if self.closed:
+                        return
+                    frames = list(self.queue.values() if self.policy == 'coalesce' else self.queue)
+                    self.queue.clear()
+                    dropped, self.dropped = self.dropped, 0
+                if dropped:
+                    frames.insert(0, EventBroadcaster.encode_dropped(dropped))
+                self.conn.sendall(b''.join(frames))
+        except OSError:
+            pass
+        finally:
+            self.conn.close()
+            self.on_close(self)
+
+
+class EventBroadcaster:
+    """
+    Streams events from one monitor to many local subscribers.
+    
+    Listens on a Unix domain socket. A client sends one subscription frame
+    (JSON: {"prefixes": [...], "kinds": [...], "policy": "drop-oldest" |
+    "coalesce", "queue": N}) and then receives event frames. All frames
+    are a u32 length followed by the body; event bodies are
+    
+        u8 type (1 = event, 2 = dropped), u8 kind, f64 time, u8 is_dir,
+        u32 folded (dropped count for type 2), u16 src length,
+        u16 dest length, src, dest
+    
+    Filters are evaluated here, once per event and subscriber, and each
+    event is encoded once no matter how many subscribers receive it.
+    """
+    
+    FRAME = struct.Struct('<IBBdBIHH')
+    LENGTH = struct.Struct('<I')
+    KINDS = ('CREATED', 'MODIFIED', 'DELETED', 'MOVED')
+    EVENT, DROPPED = 1, 2
+    HANDSHAKE_TIMEOUT = 5.0  # seconds a new client has to send its subscription
+    
+    def __init__(self, socket_path: str, default_queue: int = 10_000, logger=None):
+        self.socket_path = socket_path
+        self.default_queue = default_queue
+        self.logger = logger or logging.getLogger('FileSystemMonitor')
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+    
+    @classmethod
+    def encode(cls, kind: str, path: str, is_directory: bool, folded: int,
+               dest_path: str = None, timestamp: float = None, frame_type: int = EVENT) -> bytes:
+        src = path.encode('utf-8', 'surrogateescape')
+        dest = dest_path.encode('utf-8', 'surrogateescape') if dest_path else b''
+        length = cls.FRAME.size - cls.LENGTH.size + len(src) + len(dest)
+        header = cls.FRAME.pack(length, frame_type, cls.KINDS.index(kind),
+                                time.time() if timestamp is None else timestamp,
+                                is_directory, folded, len(src), len(dest))
+        return header + src + dest
+    
+    @classmethod
+    def encode_dropped(cls, count: int) -> bytes:
+        return cls.encode('MODIFIED', '', False, count, frame_type=cls.DROPPED)
+    
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # stale socket from an earlier run
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(64)
+        self.thread = threading.Thread(target=self._accept, name='fanout-accept', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.server.close()
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+    
+    def publish(self, kind: str, path: str, is_directory: bool, folded: int = 1,
+                dest_path: str = None, timestamp: float = None):
+        """Queue an event for every subscriber whose filter matches (never blocks)."""
+        frame = None
+        for subscriber in self.subscribers:  # list is replaced, not mutated
+            if subscriber.wants(kind, path) or (dest_path and subscriber.wants(kind, dest_path)):
+                if frame is None:
+                    frame = self.encode(kind, path, is_directory, folded, dest_path, timestamp)
+                subscriber.put(path, frame)
+    
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return  # server socket closed
+            # Read the subscription off this thread so a silent client
+            # cannot hold up everyone connecting after it
+            threading.Thread(target=self._handshake, args=(conn,),
+                             name='fanout-handshake', daemon=True).start()
+    
+    def _handshake(self, conn: socket.socket):
+        try:
+            conn.settimeout(self.HANDSHAKE_TIMEOUT)
+            request = json.loads(recv_frame(conn) or b'{}')
+            conn.settimeout(None)
+            prefixes, kinds, policy, max_queue = self._parse_request(request)
+            subscriber = Subscriber(conn, prefixes, kinds, policy, max_queue, self._remove)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Rejected subscriber: {e}")
+            conn.close()
+            return
+        with self.lock:
+            self.subscribers = self.subscribers + [subscriber]
+        self.logger.info(f"Subscriber connected ({len(self.subscribers)} total, {policy})")
+    
+    def _parse_request(self, request) -> tuple:
+        """Validate a subscription request; (prefixes, kinds, policy, queue) or ValueError."""
+        if not isinstance(request, dict):
+            raise ValueError("subscription must be a JSON object")
+        prefixes = request.get('prefixes', [])
+        kinds = request.get('kinds', [])
+        policy = request.get('policy', 'drop-oldest')
+        max_queue = request.get('queue', self.default_queue)
+        if not isinstance(prefixes, list) or not all(isinstance(p, str) for p in prefixes):
+            raise ValueError("prefixes must be a list of strings")
+        if not isinstance(kinds, list) or not all(isinstance(k, str) and k.upper() in self.KINDS
+                                                  for k in kinds):
+            raise ValueError(f"kinds must be a list of {', '.join(self.KINDS)}")
+        if policy not in Subscriber.POLICIES:
+            raise ValueError(f"unknown policy {policy!r}")
+        if isinstance(max_queue, bool) or not isinstance(max_queue, int) or max_queue < 1:
+            raise ValueError(f"queue must be a positive integer, got {max_queue!r}")
+        return tuple(prefixes), frozenset(k.upper() for k in kinds), policy, max_queue
+    
+    def _remove(self, subscriber: Subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers = [s for s in self.subscribers if s is not subscriber]
+        self.logger.info(f"Subscriber disconnected ({len(self.subscribers)} left)")
+
+
+def recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return b''
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(conn: socket.socket) -> bytes:
+    """Read one u32-length-prefixed frame body (b'' on EOF)."""
+    header = recv_exact(conn, EventBroadcaster.LENGTH.size)
+    if not header:
+        return b''
+    (length,) = EventBroadcaster.LENGTH.unpack(header)
+    return recv_exact(conn, length)
+
+
+def subscribe(socket_path: str, prefixes=(), kinds=(), policy: str = 'drop-oldest',
+              queue_size: int = 10_000):
+    """
+    Connect to a monitor started with --serve and yield
+    (time, kind, path, dest_path, is_directory, folded) per event.
+    Events the server had to discard are yielded as kind 'DROPPED' with
+    the count in `folded`.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(socket_path)
+    request = json.dumps({'prefixes': [os.path.abspath(p) for p in prefixes], 'kinds': list(kinds),
+                          'policy': policy, 'queue': queue_size}).encode()
+    conn.sendall(EventBroadcaster.LENGTH.pack(len(request)) + request)
+    
+    header = EventBroadcaster.FRAME
+    fixed_body = header.size - EventBroadcaster.LENGTH.size
+    reader = conn.makefile('rb', buffering=1 << 16)
+    try:
+        while True:
+            prefix = reader.read(header.size)
+            if len(prefix) < header.size:
+                return
+            length, frame_type, kind, timestamp, is_dir, folded, src_len, dest_len = header.unpack(prefix)
+            names = reader.read(length - fixed_body)
+            src = names[:src_len].decode('utf-8', 'surrogateescape')
+            dest = names[src_len:].decode('utf-8', 'surrogateescape') or None
+            if frame_type == EventBroadcaster.DROPPED:
+                yield timestamp, 'DROPPED', '', None, False, folded
+            else:
+                yield timestamp, EventBroadcaster.KINDS[kind], src, dest, bool(is_dir), folded
+    finally:
+        reader.close()
+        conn.close()
+
+
+def print_subscription(socket_path: str, prefixes, kinds, policy: str, queue_size: int):
+    """Print a live event feed from a --serve monitor (the --subscribe command)."""
+    for timestamp, kind, src, dest, is_directory, folded in subscribe(
+            socket_path, prefixes, kinds, policy, queue_size):
+        stamp = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        if kind == 'DROPPED':
+            print(f"{stamp} - {folded} events dropped (subscriber too slow)", flush=True)
+            continue
+        item = "DIRECTORY" if is_directory else "FILE"
+        target = f"{src} -> {dest}" if dest else src
+        suffix = f" ({folded} events folded)" if folded > 1 else ""
+        print(f"{stamp} - {item} {kind}: {target}{suffix}", flush=True)
+
+
+class ContentVerifier:
+    """
+    Drops MODIFIED events whose file content did not actually change.
+    
+    Keeps a path -> (size, mtime_ns, digest) signature cache, loaded from
+    and persisted to SQLite. A modified file whose size and mtime match
+    its cached signature is dropped without reading it (metadata-only
+    change); otherwise it is hashed with chunked BLAKE2b on a thread pool
+    and reported only if the digest differs. Created files are hashed in
+    the background so their first modification can be verified.
+    
+    Checks run after the event, so a file may be renamed before or while
+    its check runs; the check then follows it and reports the new name. A
+    file that is gone for any other reason has its modification reported
+    unverified. A verified MODIFIED event is emitted when its check
+    finishes, possibly after a later MOVED or DELETED event for the same
+    file, but it carries the time the modification was observed, so log
+    lines and subscriber frames sort back into order by timestamp. (The
+    journal keeps write order and raises such a time to that of the
+    record before it.)
+    """
+    
+    CHUNK_SIZE = 1 << 20
+    
+    def __init__(self, emit, cache_path: str = None, workers: int = 4):
+        """
+        Initialize the verifier.
+        
+        Args:
+            emit: Callback emit(kind, path, is_directory, folded, timestamp)
+                for events that passed verification
+            cache_path: SQLite file persisting signatures across runs
+                (None keeps them in memory only)
+            workers: Hashing threads
+        """
+        self.emit = emit
+        self.cache_path = cache_path
+        self.signatures = {}
+        self.dirty = {}         # path -> signature, or None for deleted
+        self.in_flight = {}     # path -> (folded, report, timestamp) of a queued re-check
+        self.renamed = {}       # in-flight path -> where it has since been moved
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='verifier')
+        self.verified = 0
+        self.suppressed = 0
+        if cache_path:
+            with sqlite3.connect(cache_path) as db:
+                db.execute("CREATE TABLE IF NOT EXISTS signatures "
+                           "(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest BLOB)")
+                for path, size, mtime_ns, digest in db.execute("SELECT * FROM signatures"):
+                    self.signatures[path] = (size, mtime_ns, digest)
+    
+    def modified(self, path: str, folded: int = 1, timestamp: float = None):
+        """
+        Verify a MODIFIED event; it is emitted later only if content changed,
+        stamped with `timestamp` (when it was observed; default now).
+        """
+        self._schedule(path, (folded, True, time.time() if timestamp is None else timestamp))
+    
+    def created(self, path: str):
+        """Record the signature of a new file (the CREATED event is not held back)."""
+        self._schedule(path, (0, False, None))
+    
+    def deleted(self, path: str):
+        with self.lock:
+            if self.signatures.pop(path, None) is not None:
+                self.dirty[path] = None
+    
+    def moved(self, src_path: str, dest_path: str):
+        with self.lock:
+            signature = self.signatures.pop(src_path, None)
+            if signature is not None:
+                self.signatures[dest_path] = signature
+                self.dirty[src_path] = None
+                self.dirty[dest_path] = signature
+            # Let pending checks under src_path find the file at its new name
+            prefix = src_path + os.sep
+            for path in self.in_flight:
+                current = self.renamed.get(path, path)
+                if current == src_path or current.startswith(prefix):
+                    self.renamed[path] = dest_path + current[len(src_path):]
+    
+    @staticmethod
+    def _merge(first, second):
+        """Fold two (folded, report, timestamp) check requests into one."""
+        times = [t for t in (first[2], second[2]) if t is not None]
+        return first[0] + second[0], first[1] or second[1], max(times) if times else None
+    
+    def _schedule(self, path: str, request):
+        with self.lock:
+            if path in self.in_flight:
+                # One check per path at a time; fold this one into a re-check
+                self.in_flight[path] = self._merge(self.in_flight[path], request)
+                return
+            self.in_flight[path] = (0, False, None)
+        self.pool.submit(self._verify, path, request)
+    
+    def _verify(self, path: str, request):
+        while True:
+            folded, report, timestamp = request
+            changed = self._check(path)
+            if changed is None:
+                with self.lock:
+                    request = self._merge(request, self.in_flight.pop(path))
+                    dest_path = self.renamed.pop(path, None)
+                    if dest_path is not None:
+                        if dest_path not in self.in_flight:
+                            # Renamed before the check ran: check it under its new name
+                            self.in_flight[dest_path] = (0, False, None)
+                            path = dest_path
+                            continue
+                        self.in_flight[dest_path] = self._merge(self.in_flight[dest_path], request)
+                        return
+                    folded, report, timestamp = request
+                    if report:
+                        self.verified += 1
+                if report:
+                    # Gone before it could be checked; report rather than drop it
+                    self.emit("MODIFIED", path, False, folded, timestamp)
+                return
+            with self.lock:
+                if report:
+                    self.verified += 1
+                    if not changed:
+                        self.suppressed += 1
+                # Renamed while it was being hashed: report the current name
+                current = self.renamed.get(path, path)
+            if report and changed:
+                self.emit("MODIFIED", current, False, folded, timestamp)
+            with self.lock:
+                request = self.in_flight.pop(path)
+                if not request[0] and not request[1]:
+                    self.renamed.pop(path, None)
+                    return
+                self.in_flight[path] = (0, False, None)
+    
+    def _check(self, path: str):
+        """
+        Refresh path's signature.
+        
+        Returns True if its content changed (or is unknown), False if not,
+        and None if the file is gone.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            cached = self.signatures.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return False
+        try:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        except OSError:
+            return True  # unreadable; report rather than hide the change
+        signature = (st.st_size, st.st_mtime_ns, digest.digest())
+        with self.lock:
+            # Renamed while hashing: the signature belongs to the new name
+            target = self.renamed.get(path, path)
+            self.signatures[target] = signature
+            self.dirty[target] = signature
+        return cached is None or cached[2] != signature[2]
+    
+    def flush(self):
+        """Persist changed signatures to the SQLite cache."""
+        if not self.cache_path:
+            return
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+        if not dirty:
+            return
+        with sqlite3.connect(self.cache_path) as db:
+            db.executemany("DELETE FROM signatures WHERE path = ?",
+                           [(p,) for p, s in dirty.items() if s is None])
+            db.executemany("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?)",
+                           [(p, *s) for p, s in dirty.items() if s is not None])
+    
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.flush()
 
 
 class FileChangeHandler(FileSystemEventHandler):
     """Handler for file system events with timestamp logging."""
     
-    def __init__(self, log_file: str = None):
+    def __init__(self, log_file: str = None, coalesce_window: float = 0.05,
+                 journal: EventJournal = None):
         """
         Initialize the handler.
         
         Args:
             log_file: Optional path to log file. If None, logs to console only.
+            coalesce_window: Per-path debounce window in seconds (0 disables
+                coalescing and logs every raw event)
+            journal: Optional EventJournal receiving every logged event
         """
         super().__init__()
         self.setup_logging(log_file)
+        self.journal = journal
+        self.broadcaster = None
+        self.verifier = None
+        self.coalescer = EventCoalescer(self.log_event, coalesce_window) if coalesce_window > 0 else None
+        self.reconciler = None
     
     def setup_logging(self, log_file: str = None):
         """Configure logging with timestamps."""
@@ -53,39 +891,630 @@ class FileChangeHandler(FileSystemEventHandler):
             file_handler.setFormatter(formatter)
             self.logger.addHandler(file_handler)
     
+    def log_event(self, kind: str, path: str, is_directory: bool, folded: int = 1):
+        """Log a (possibly coalesced) event, verifying file modifications first."""
+        if self.verifier and not is_directory:
+            if kind == "MODIFIED":
+                self.verifier.modified(path, folded, time.time())
+                return  # logged by the verifier if the content changed
+            if kind == "CREATED":
+                self.verifier.created(path)
+            elif kind == "DELETED":
+                self.verifier.deleted(path)
+        self.write_event(kind, path, is_directory, folded)
+    
+    def write_event(self, kind: str, path: str, is_directory: bool, folded: int = 1,
+                    timestamp: float = None):
+        """
+        Write an event to the log, journal and subscribers.
+        
+        `timestamp` is when a delayed (verified) event was observed; the
+        default is now.
+        """
+        item = "DIRECTORY" if is_directory else "FILE"
+        suffix = f" ({folded} events folded)" if folded > 1 else ""
+        message = f"{item} {kind}: {path}{suffix}"
+        if timestamp is None:
+            self.logger.info(message)
+        else:
+            record = self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 0,
+                                            message, None, None)
+            record.created, record.msecs = timestamp, (timestamp % 1) * 1000
+            self.logger.handle(record)
+        if self.journal:
+            self.journal.append(kind, path, is_directory, folded, timestamp=timestamp)
+        if self.broadcaster:
+            self.broadcaster.publish(kind, path, is_directory, folded, timestamp=timestamp)
+    
+    def dispatch_event(self, kind: str, path: str, is_directory: bool):
+        """Route a raw event through the coalescer, if enabled."""
+        if self.reconciler:
+            self.reconciler.note(kind, path)
+        self.emit_event(kind, path, is_directory)
+    
+    def emit_event(self, kind: str, path: str, is_directory: bool):
+        """Coalesce and log an event (also used for synthetic rescan events)."""
+        if self.coalescer:
+            self.coalescer.submit(kind, path, is_directory)
+        else:
+            self.log_event(kind, path, is_directory)
+    
+    def close(self):
+        """Emit pending coalesced events and report how much was folded."""
+        if self.coalescer:
+            self.coalescer.close()
+            raw, emitted = self.coalescer.raw_events, self.coalescer.emitted
+            self.logger.info(f"Coalesced {raw} raw events into {emitted} log entries "
+                             f"({raw - emitted} folded)")
+        if self.verifier:
+            self.verifier.close()
+            self.logger.info(f"Verified {self.verifier.verified} modifications, "
+                             f"{self.verifier.suppressed} had unchanged content")
+        if self.journal:
+            self.journal.close()
+    
     def on_created(self, event: FileSystemEvent):
         """Called when a file or directory is created."""
-        if not event.is_directory:
-            self.logger.info(f"FILE CREATED: {event.src_path}")
-        else:
-            self.logger.info(f"DIRECTORY CREATED: {event.src_path}")
+        self.dispatch_event("CREATED", event.src_path, event.is_directory)
     
     def on_deleted(self, event: FileSystemEvent):
         """Called when a file or directory is deleted."""
-        if not event.is_directory:
-            self.logger.info(f"FILE DELETED: {event.src_path}")
-        else:
-            self.logger.info(f"DIRECTORY DELETED: {event.src_path}")
+        self.dispatch_event("DELETED", event.src_path, event.is_directory)
     
     def on_modified(self, event: FileSystemEvent):
         """Called when a file or directory is modified."""
-        if not event.is_directory:
-            self.logger.info(f"FILE MODIFIED: {event.src_path}")
-        else:
-            self.logger.info(f"DIRECTORY MODIFIED: {event.src_path}")
+        self.dispatch_event("MODIFIED", event.src_path, event.is_directory)
     
     def on_moved(self, event: FileSystemEvent):
         """Called when a file or directory is moved/renamed."""
+        # Keep ordering: anything pending for the old path is logged first,
+        # and a modification it holds is in flight before the verifier moves
+        if self.coalescer:
+            self.coalescer.flush_path(event.src_path)
+        if self.reconciler:
+            self.reconciler.note("MOVED", event.src_path, event.dest_path)
+        if self.verifier:
+            self.verifier.moved(event.src_path, event.dest_path)
         if not event.is_directory:
             self.logger.info(f"FILE MOVED: {event.src_path} -> {event.dest_path}")
         else:
             self.logger.info(f"DIRECTORY MOVED: {event.src_path} -> {event.dest_path}")
+        if self.journal:
+            self.journal.append("MOVED", event.src_path, event.is_directory,
+                                dest_path=event.dest_path)
+        if self.broadcaster:
+            self.broadcaster.publish("MOVED", event.src_path, event.is_directory,
+                                     dest_path=event.dest_path)
+    
+    def on_overflow(self):
+        """Called when the kernel event queue overflowed and events were lost."""
+        self.logger.warning("Event queue overflow, events were lost")
+        if self.reconciler:
+            self.reconciler.request()
+
+
+class NativeEvent:
+    """Minimal stand-in for watchdog's FileSystemEvent."""
+    
+    __slots__ = ('event_type', 'src_path', 'dest_path', 'is_directory')
+    
+    def __init__(self, event_type: str, src_path: str, is_directory: bool, dest_path: str = ''):
+        self.event_type = event_type
+        self.src_path = src_path
+        self.dest_path = dest_path
+        self.is_directory = is_directory
+
+
+class InotifyObserver:
+    """
+    Linux inotify backend with the same schedule/start/stop/join interface
+    as watchdog's Observer.
+    
+    Talks to inotify_init1/inotify_add_watch through ctypes and decodes
+    every inotify_event in one large read() buffer per wakeup, calling the
+    handler's on_created/on_deleted/on_modified/on_moved directly on the
+    reader thread. Rename pairs are matched by cookie; a pair split across
+    two reads is completed by the next read. A directory moved out of the
+    tree loses the watches of its whole subtree. A directory created after
+    the watch limit is reached is polled (a TreeReconciler rescan every
+    POLL_INTERVAL seconds) instead of ending the reader thread.
+    """
+    
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_DONT_FOLLOW = 0x02000000
+    IN_EXCL_UNLINK = 0x04000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+                  IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR |
+                  IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+    
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+    READ_SIZE = 1 << 20
+    MOVE_PAIR_TIMEOUT = 50  # ms to wait for the IN_MOVED_TO of a split pair
+    POLL_INTERVAL = 2.0     # s between scans of subtrees that could not be watched
+    
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self.handler = None
+        self.recursive = True
+        self.watches = {}   # wd -> directory path
+        self.wd_of = {}     # directory path -> wd
+        self.overflows = 0
+        self._moved_from = {}  # cookie -> (path, is_dir) of a pair split across reads
+        self.pollers = []      # TreeReconcilers standing in for watches past the limit
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._thread = None
+    
+    @staticmethod
+    def available() -> bool:
+        """Whether this platform's libc provides inotify."""
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+            return hasattr(libc, 'inotify_init1')
+        except OSError:
+            return False
+    
+    def schedule(self, event_handler, path: str, recursive: bool = False):
+        """Watch path (and, if recursive, every directory below it)."""
+        self.handler = event_handler
+        self.recursive = recursive
+        if recursive:
+            self._watch_tree(path)
+        else:
+            self._watch(path)
+    
+    def start(self):
+        """Start the reader thread."""
+        self._thread = threading.Thread(target=self._run, name='inotify-reader', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Ask the reader thread (and any subtree pollers) to exit."""
+        os.write(self._wakeup_w, b'x')
+        for poller in self.pollers:
+            poller.stop()
+    
+    def join(self, timeout: float = None):
+        """Wait for the reader thread and release the inotify descriptor."""
+        if self._thread:
+            self._thread.join(timeout)
+        for fd in (self.fd, self._wakeup_r, self._wakeup_w):
+            os.close(fd)
+    
+    def _watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno == 28:  # ENOSPC
+                raise OSError(errno, "inotify watch limit reached "
+                              "(raise fs.inotify.max_user_watches)")
+            return -1  # vanished or unreadable; nothing to watch
+        self.watches[wd] = path
+        self.wd_of[path] = wd
+        return wd
+    
+    def _watch_tree(self, root: str, report_contents: bool = False):
+        """
+        Watch root and its subdirectories. With report_contents, entries
+        found below root are reported as created: they may have appeared
+        before the watch existed.
+        
+        Reaching the watch limit is fatal at startup. Later (report_contents,
+        on the reader thread) the walk goes on without watches and the
+        subtrees left unwatched are polled instead.
+        """
+        stack = [(root, False)]  # (directory, an ancestor is already polled)
+        unwatched = []
+        while stack:
+            directory, polled = stack.pop()
+            if not polled:
+                try:
+                    if self._watch(directory) < 0:
+                        continue
+                except OSError:
+                    if not report_contents:
+                        raise
+                    unwatched.append(directory)
+                    polled = True
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if report_contents:
+                            self.handler.on_created(NativeEvent('created', entry.path, is_dir))
+                        if is_dir:
+                            stack.append((entry.path, polled))
+            except OSError:
+                continue
+        for directory in unwatched:
+            self._poll_tree(directory)
+    
+    def _poll_tree(self, root: str):
+        """Cover a subtree that could not get watches with periodic rescans."""
+        logger = logging.getLogger('FileSystemMonitor.poll')
+        if not self.pollers:
+            logger.warning(f"inotify watch limit reached (raise fs.inotify.max_user_watches); "
+                           f"polling new directories like {root} every "
+                           f"{self.POLL_INTERVAL:g}s instead")
+            logger.setLevel(logging.WARNING)  # No summary line for every poll
+        poller = TreeReconciler(root, self._emit_polled, workers=2,
+                                interval=self.POLL_INTERVAL, logger=logger)
+        poller.start()
+        self.pollers.append(poller)
+    
+    def _emit_polled(self, kind: str, path: str, is_directory: bool):
+        event_type = kind.lower()
+        getattr(self.handler, 'on_' + event_type)(NativeEvent(event_type, path, is_directory))
+    
+    def add_watch(self, path: str):
+        """Watch a single directory found outside the event stream (e.g. by a rescan)."""
+        if path in self.wd_of or self._polled(path):
+            return
+        try:
+            self._watch(path)
+        except OSError:
+            self._poll_tree(path)
+    
+    def _polled(self, path: str) -> bool:
+        return any(path == poller.root or path.startswith(poller.root + os.sep)
+                   for poller in self.pollers)
+    
+    def _forget(self, wd: int):
+        path = self.watches.pop(wd, None)
+        if path is not None and self.wd_of.get(path) == wd:
+            del self.wd_of[path]
+    
+    def _unwatch_tree(self, root: str):
+        """Remove the watches of root and everything below it (moved out of the tree)."""
+        prefix = root + os.sep
+        for wd, path in list(self.watches.items()):
+            if path == root or path.startswith(prefix):
+                self._rm_watch(self.fd, wd)  # The IN_IGNORED that follows is a no-op
+                self._forget(wd)
+    
+    def _moved_out(self, path: str, is_dir: bool):
+        """An IN_MOVED_FROM without partner: the entry left the watched tree."""
+        if is_dir:
+            self._unwatch_tree(path)
+        self.handler.on_deleted(NativeEvent('deleted', path, is_dir))
+    
+    def _rename_tree(self, old: str, new: str):
+        """Rewrite watched paths after a directory was renamed."""
+        prefix = old + os.sep
+        for wd, path in list(self.watches.items()):
+            if path == old or path.startswith(prefix):
+                renamed = new + path[len(old):]
+                self.watches[wd] = renamed
+                self.wd_of.pop(path, None)
+                self.wd_of[renamed] = wd
+    
+    def _run(self):
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        poller.register(self._wakeup_r, select.POLLIN)
+        while True:
+            ready = {fd for fd, _ in poller.poll(self.MOVE_PAIR_TIMEOUT if self._moved_from else None)}
+            if self._wakeup_r in ready:
+                return
+            if not ready:
+                # The split pair's IN_MOVED_TO never came: moved out of the tree
+                for path, is_dir in self._moved_from.values():
+                    self._moved_out(path, is_dir)
+                self._moved_from.clear()
+                continue
+            try:
+                buffer = os.read(self.fd, self.READ_SIZE)
+            except BlockingIOError:
+                continue
+            self._dispatch(buffer)
+    
+    def _dispatch(self, buffer: bytes):
+        """Decode every inotify_event in buffer and invoke the handler."""
+        handler = self.handler
+        watches = self.watches
+        unpack_from = self.EVENT_HEADER.unpack_from
+        header_size = self.EVENT_HEADER.size
+        # A pair split by the previous read completes at the start of this one
+        moved_from, self._moved_from = self._moved_from, {}
+        last_moved_from = None  # cookie, if the buffer's last event is an IN_MOVED_FROM
+        offset, end = 0, len(buffer)
+        
+        while offset < end:
+            last_moved_from = None
+            wd, mask, cookie, length = unpack_from(buffer, offset)
+            name_start = offset + header_size
+            offset = name_start + length
+            
+            if mask & self.IN_Q_OVERFLOW:
+                self.overflows += 1
+                on_overflow = getattr(handler, 'on_overflow', None)
+                if on_overflow:
+                    on_overflow()
+                continue
+            if mask & self.IN_IGNORED:
+                self._forget(wd)
+                continue
+            directory = watches.get(wd)
+            if directory is None:
+                continue
+            if not length:
+                continue  # *_SELF events; the parent watch reports the change
+            
+            name = buffer[name_start:offset].rstrip(b'\0')
+            path = os.path.join(directory, os.fsdecode(name))
+            is_dir = bool(mask & self.IN_ISDIR)
+            
+            if mask & self.IN_CREATE:
+                handler.on_created(NativeEvent('created', path, is_dir))
+                if is_dir and self.recursive:
+                    self._watch_tree(path, report_contents=True)
+            elif mask & self.IN_DELETE:
+                handler.on_deleted(NativeEvent('deleted', path, is_dir))
+            elif mask & (self.IN_MODIFY | self.IN_ATTRIB):
+                handler.on_modified(NativeEvent('modified', path, is_dir))
+            elif mask & self.IN_MOVED_FROM:
+                moved_from[cookie] = (path, is_dir)
+                last_moved_from = cookie
+            elif mask & self.IN_MOVED_TO:
+                source = moved_from.pop(cookie, None)
+                if source is not None:
+                    if is_dir:
+                        self._rename_tree(source[0], path)
+                    handler.on_moved(NativeEvent('moved', source[0], is_dir, path))
+                else:
+                    handler.on_created(NativeEvent('created', path, is_dir))
+                    if is_dir and self.recursive:
+                        self._watch_tree(path, report_contents=True)
+        
+        # The kernel queues IN_MOVED_TO right behind its IN_MOVED_FROM, so only
+        # a trailing IN_MOVED_FROM can still be paired by the next read
+        if last_moved_from is not None:
+            self._moved_from[last_moved_from] = moved_from.pop(last_moved_from)
+        for path, is_dir in moved_from.values():
+            self._moved_out(path, is_dir)
+
+
+class TreeReconciler:
+    """
+    Recovers from lost events by diffing the tree against a snapshot.
+    
+    Keeps an in-memory (inode, size, mtime) snapshot per path, plus a
+    directory -> children index so a directory move only touches the moved
+    subtree. Live events update the snapshot with the entry's current
+    stat, so a rescan only emits the creates, deletes and modifies that
+    never arrived. A rescan runs on its own thread when requested (queue
+    overflow) or every `interval` seconds, and walks the tree with a
+    thread pool, one os.scandir task per directory.
+    """
+    
+    def __init__(self, root: str, emit, recursive: bool = True, workers: int = 8,
+                 interval: float = 0, on_new_directory=None, logger=None):
+        """
+        Initialize the reconciler.
+        
+        Args:
+            root: Directory being monitored
+            emit: Callback emit(kind, path, is_directory) for synthetic events
+            recursive: Whether subdirectories are part of the tree
+            workers: Threads used for the parallel walk
+            interval: Also rescan every N seconds (0 = only on request)
+            on_new_directory: Called with each directory found by a rescan
+                that was not known before (e.g. to add an inotify watch)
+            logger: Logger for rescan summaries
+        """
+        self.root = root
+        self.emit = emit
+        self.recursive = recursive
+        self.workers = workers
+        self.interval = interval
+        self.on_new_directory = on_new_directory
+        self.logger = logger or logging.getLogger('FileSystemMonitor')
+        self.snapshot = {}
+        self.children = {}     # directory -> set of child paths in snapshot
+        self.lock = threading.Lock()
+        self._scan_notes = None  # live updates made while a rescan walks the tree
+        self.requested = threading.Event()
+        self.running = False
+        self.thread = None
+        self.rescans = 0
+    
+    def start(self):
+        """Take the initial snapshot and start the rescan thread."""
+        self.snapshot = self.walk()
+        self.children = self._index(self.snapshot)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='reconciler', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.running = False
+        self.requested.set()
+        if self.thread:
+            self.thread.join()
+    
+    def request(self):
+        """Schedule a rescan (several requests before it runs collapse into one)."""
+        self.requested.set()
+    
+    def note(self, kind: str, path: str, dest_path: str = None):
+        """Record a live event so the next rescan does not report it again."""
+        if kind == 'MOVED':
+            update = ('MOVED', path, dest_path, self._stat(dest_path))
+        elif kind == 'DELETED':
+            update = ('DELETED', path, None, None)
+        else:
+            update = ('SET', path, None, self._stat(path))
+        with self.lock:
+            self._apply(update, self.snapshot, self.children)
+            if self._scan_notes is not None:
+                self._scan_notes.append(update)
+    
+    @staticmethod
+    def _stat(path: str):
+        """Snapshot value of path as a scan would record it, or None if it is gone."""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+        if stat.S_ISDIR(st.st_mode):
+            return (st.st_ino, 0, 0, True)
+        return (st.st_ino, st.st_size, st.st_mtime_ns, False)
+    
+    @staticmethod
+    def _index(snapshot: dict) -> dict:
+        children = {}
+        for path in snapshot:
+            children.setdefault(os.path.dirname(path), set()).add(path)
+        return children
+    
+    @classmethod
+    def _apply(cls, update, snapshot: dict, children: dict):
+        """Apply one live update to a snapshot and its children index."""
+        kind, path, dest_path, state = update
+        if kind == 'SET' and state is not None:
+            snapshot[path] = state
+            children.setdefault(os.path.dirname(path), set()).add(path)
+            return
+        # Deleted (or vanished before it could be stat'ed) or moved away
+        removed = []
+        stack = [path]
+        while stack:
+            entry = stack.pop()
+            if entry in snapshot:
+                removed.append((entry, snapshot.pop(entry)))
+            stack.extend(children.pop(entry, ()))
+        siblings = children.get(os.path.dirname(path))
+        if siblings is not None:
+            siblings.discard(path)
+        if kind != 'MOVED':
+            return
+        for entry, entry_state in removed:
+            moved = dest_path + entry[len(path):]
+            snapshot[moved] = entry_state
+            children.setdefault(os.path.dirname(moved), set()).add(moved)
+        if state is not None:
+            snapshot[dest_path] = state
+            children.setdefault(os.path.dirname(dest_path), set()).add(dest_path)
+    
+    def walk(self) -> dict:
+        """Scan the tree in parallel; returns path -> (inode, size, mtime_ns, is_dir)."""
+        snapshot = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self._scan_directory, self.root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entries, subdirectories = future.result()
+                    snapshot.update(entries)
+                    if self.recursive:
+                        pending.update(pool.submit(self._scan_directory, d) for d in subdirectories)
+        return snapshot
+    
+    @staticmethod
+    def _scan_directory(directory: str):
+        entries, subdirectories = [], []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_dir:
+                            # A directory's own mtime changes with its children; its
+                            # inode is enough to notice it being replaced
+                            entries.append((entry.path, (entry.inode(), 0, 0, True)))
+                            subdirectories.append(entry.path)
+                        else:
+                            st = entry.stat(follow_symlinks=False)
+                            entries.append((entry.path, (st.st_ino, st.st_size, st.st_mtime_ns, False)))
+                    except OSError:
+                        continue  # vanished mid-scan
+        except OSError:
+            pass
+        return entries, subdirectories
+    
+    def rescan(self):
+        """Walk the tree, emit the differences and adopt the new snapshot."""
+        started = time.monotonic()
+        with self.lock:
+            self._scan_notes = []
+        current = self.walk()
+        children = self._index(current)
+        with self.lock:
+            # Live events during the walk were already reported and applied to
+            # the old snapshot; replay them so both sides agree on those paths
+            for update in self._scan_notes:
+                self._apply(update, current, children)
+            self._scan_notes = None
+            previous, self.snapshot, self.children = self.snapshot, current, children
+        
+        created, modified = [], []
+        for path, state in current.items():
+            old = previous.get(path)
+            if old is None:
+                created.append(path)
+            elif old != state:
+                modified.append(path)
+        deleted = [path for path in previous if path not in current]
+        
+        # Parents before children for creates, children before parents for deletes
+        for path in sorted(created):
+            is_dir = current[path][3]
+            if is_dir and self.on_new_directory:
+                self.on_new_directory(path)
+            self.emit('CREATED', path, is_dir)
+        for path in modified:
+            self.emit('MODIFIED', path, current[path][3])
+        for path in sorted(deleted, reverse=True):
+            self.emit('DELETED', path, previous[path][3])
+        
+        self.rescans += 1
+        self.logger.info(f"Rescan of {self.root} took {time.monotonic() - started:.2f}s "
+                         f"({len(current)} entries): {len(created)} created, "
+                         f"{len(modified)} modified, {len(deleted)} deleted")
+    
+    def _run(self):
+        while True:
+            self.requested.wait(self.interval or None)
+            if not self.running:
+                return
+            self.requested.clear()
+            try:
+                self.rescan()
+            except Exception as e:
+                self.logger.error(f"Rescan failed: {e}")
 
 
 class FileSystemMonitor:
     """Main file system monitoring class."""
     
-    def __init__(self, path: str, log_file: str = None, recursive: bool = True):
+    def __init__(self, path: str, log_file: str = None, recursive: bool = True,
+                 coalesce_window: float = 0.05, backend: str = 'watchdog',
+                 reconcile: bool = None, rescan_interval: float = 0, scan_workers: int = 8,
+                 journal: str = None, serve_socket: str = None,
+                 verify: bool = False, verify_cache: str = None):
         """
         Initialize the file system monitor.
         
@@ -93,11 +1522,43 @@ class FileSystemMonitor:
             path: Directory path to monitor
             log_file: Optional path to log file
             recursive: Whether to monitor subdirectories recursively
+            coalesce_window: Per-path debounce window in seconds (0 disables)
+            backend: 'watchdog' or 'inotify' (optional native Linux backend)
+            reconcile: Keep a tree snapshot and rescan after a queue overflow.
+                None (default) enables it only where something triggers a
+                rescan: the inotify backend (which reports overflows) or a
+                rescan_interval. watchdog never reports overflows.
+            rescan_interval: Additionally rescan every N seconds (0 disables)
+            scan_workers: Threads used by a rescan
+            journal: Optional path of an EventJournal to append events to
+            serve_socket: Optional Unix socket path to stream events to subscribers
+            verify: Only report modifications that change file content
+            verify_cache: SQLite file persisting content signatures (implies verify)
         """
         self.path = Path(path).resolve()
         self.recursive = recursive
-        self.event_handler = FileChangeHandler(log_file)
-        self.observer = Observer()
+        if backend == 'inotify' and not InotifyObserver.available():
+            raise ValueError("inotify backend is only available on Linux")
+        if backend == 'watchdog' and Observer is None:
+            raise ValueError("watchdog backend requires the watchdog package "
+                             "(or use --backend inotify on Linux)")
+        self.backend = backend
+        self.event_handler = FileChangeHandler(
+            log_file, coalesce_window, EventJournal(journal) if journal else None)
+        self.observer = InotifyObserver() if backend == 'inotify' else Observer()
+        if verify or verify_cache:
+            self.event_handler.verifier = ContentVerifier(self.event_handler.write_event, verify_cache)
+        if serve_socket:
+            self.event_handler.broadcaster = EventBroadcaster(
+                serve_socket, logger=self.event_handler.logger)
+        if reconcile is None:
+            reconcile = backend == 'inotify' or rescan_interval > 0
+        if reconcile:
+            self.event_handler.reconciler = TreeReconciler(
+                str(self.path), self.event_handler.emit_event, recursive,
+                workers=scan_workers, interval=rescan_interval,
+                on_new_directory=self.observer.add_watch if backend == 'inotify' else None,
+                logger=self.event_handler.logger)
         
         # Validate path
         if not self.path.exists():
@@ -112,6 +1573,7 @@ class FileSystemMonitor:
         print(f"{'='*70}")
         print(f"Monitoring: {self.path}")
         print(f"Recursive: {self.recursive}")
+        print(f"Backend: {self.backend}")
         print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*70}\n")
         print("Press Ctrl+C to stop monitoring...\n")
@@ -123,12 +1585,26 @@ class FileSystemMonitor:
             recursive=self.recursive
         )
         
-        # Start the observer
+        if self.event_handler.broadcaster:
+            self.event_handler.broadcaster.start()
+            print(f"Serving events on: {self.event_handler.broadcaster.socket_path}\n")
+        
+        # Snapshot the tree for overflow recovery, then start the observer
+        reconciler = self.event_handler.reconciler
+        if reconciler:
+            started = time.monotonic()
+            reconciler.start()
+            print(f"Snapshot: {len(reconciler.snapshot)} entries in {time.monotonic() - started:.2f}s\n")
         self.observer.start()
         
         try:
             while True:
                 time.sleep(1)
+                # Bound how long journal records and signatures sit in memory
+                if self.event_handler.journal:
+                    self.event_handler.journal.flush()
+                if self.event_handler.verifier:
+                    self.event_handler.verifier.flush()
         except KeyboardInterrupt:
             self.stop()
     
@@ -138,6 +1614,11 @@ class FileSystemMonitor:
         print("Stopping File System Monitor...")
         self.observer.stop()
         self.observer.join()
+        if self.event_handler.reconciler:
+            self.event_handler.reconciler.stop()
+        self.event_handler.close()
+        if self.event_handler.broadcaster:
+            self.event_handler.broadcaster.stop()
         print(f"Stopped at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*70}\n")
 
@@ -159,11 +1640,32 @@ Examples:
   
   # Monitor without recursion
   python file_monitor.py /path/to/watch --no-recursive
+  
+  # Use the native inotify backend instead of watchdog (Linux)
+  python file_monitor.py /path/to/watch --backend inotify
+  
+  # Also reconcile against a fresh scan every 60 seconds
+  python file_monitor.py /path/to/watch --rescan-interval 60
+  
+  # Log every raw event instead of coalescing per path
+  python file_monitor.py /path/to/watch --coalesce-ms 0
+  
+  # Record events in an indexed journal, then ask what changed under /data
+  python file_monitor.py /data --journal events.journal
+  python file_monitor.py --query events.journal --since "14:00" --until "14:05" --prefix /data
+  
+  # Only report modifications that change file content, remembering signatures
+  python file_monitor.py /path/to/watch --verify-cache signatures.db
+  
+  # One watcher, many consumers: serve the feed, then subscribe from other tools
+  python file_monitor.py /data --serve /tmp/fsmon.sock
+  python file_monitor.py --subscribe /tmp/fsmon.sock --prefix /data/src --policy coalesce
         """
     )
     
     parser.add_argument(
         'path',
+        nargs='?',
         help='Directory path to monitor'
     )
     
@@ -178,13 +1680,151 @@ Examples:
         help='Disable recursive monitoring of subdirectories'
     )
     
+    parser.add_argument(
+        '--coalesce-ms',
+        type=float,
+        default=50,
+        help='Merge events per path within this window in milliseconds (default: 50, 0 disables)'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        choices=['watchdog', 'inotify'],
+        default='watchdog',
+        help='Event source (default: watchdog; inotify is the optional native Linux backend)'
+    )
+    
+    parser.add_argument(
+        '--no-reconcile',
+        action='store_true',
+        help='Do not keep a tree snapshot for rescans (by default one is kept with '
+             '--backend inotify or --rescan-interval)'
+    )
+    
+    parser.add_argument(
+        '--rescan-interval',
+        type=float,
+        default=0,
+        help='Rescan the tree every N seconds (default: 0, only after inotify overflows)'
+    )
+    
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=8,
+        help='Threads used to walk the tree during a rescan (default: 8)'
+    )
+    
+    parser.add_argument(
+        '--journal',
+        help='Also append events to this indexed binary journal'
+    )
+    
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Hash modified files and drop modifications that leave content unchanged'
+    )
+    
+    parser.add_argument(
+        '--verify-cache',
+        metavar='DB',
+        help='SQLite file persisting content signatures across runs (implies --verify)'
+    )
+    
+    parser.add_argument(
+        '--query',
+        metavar='JOURNAL',
+        help='Print journal events instead of monitoring (see --since/--until/--prefix)'
+    )
+    
+    parser.add_argument(
+        '--since',
+        help='Query start, "YYYY-MM-DD HH:MM[:SS]" or "HH:MM[:SS]" for today'
+    )
+    
+    parser.add_argument(
+        '--until',
+        help='Query end, same format as --since'
+    )
+    
+    parser.add_argument(
+        '--prefix',
+        action='append',
+        help='Only query/subscribe to events under this path (repeatable for --subscribe)'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        metavar='SOCKET',
+        help='Stream events to subscribers over this Unix domain socket'
+    )
+    
+    parser.add_argument(
+        '--subscribe',
+        metavar='SOCKET',
+        help='Print the event feed of a monitor started with --serve'
+    )
+    
+    parser.add_argument(
+        '--kind',
+        action='append',
+        choices=['created', 'modified', 'deleted', 'moved'],
+        help='With --subscribe: only these event kinds (repeatable)'
+    )
+    
+    parser.add_argument(
+        '--policy',
+        choices=Subscriber.POLICIES,
+        default='drop-oldest',
+        help='With --subscribe: what the server does when this subscriber falls behind'
+    )
+    
+    parser.add_argument(
+        '--queue',
+        type=int,
+        default=10_000,
+        help='With --subscribe: events the server buffers for this subscriber (default: 10000)'
+    )
+    
     args = parser.parse_args()
     
+    if args.query:
+        if args.prefix and len(args.prefix) > 1:
+            parser.error("--query takes a single --prefix")
+        try:
+            query_journal(args.query, args.since, args.until, args.prefix and args.prefix[0])
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if args.subscribe:
+        try:
+            print_subscription(args.subscribe, args.prefix or (), args.kind or (),
+                               args.policy, args.queue)
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if not args.path:
+        parser.error("the following arguments are required: path")
+    
     try:
         monitor = FileSystemMonitor(
             path=args.path,
             log_file=args.log_file,
-            recursive=not args.no_recursive
+            recursive=not args.no_recursive,
+            coalesce_window=args.coalesce_ms / 1000,
+            backend=args.backend,
+            reconcile=False if args.no_reconcile else None,
+            rescan_interval=args.rescan_interval,
+            scan_workers=args.scan_workers,
+            journal=args.journal,
+            serve_socket=args.serve,
+            verify=args.verify,
+            verify_cache=args.verify_cache
         )
         monitor.start()
     except ValueError as e:
@@ -4,7 +4,10 @@ File System Monitor - Event-driven file system change tracking
 Uses watchdog library for immediate, non-polling file system monitoring
 """
 
+import os
+import queue
 import sys
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
@@ -12,24 +15,224 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 
 
+class BatchedLogWriter:
+    """
+    Background writer that takes log lines off the observer thread
+    
+    Lines go into a bounded queue; a worker thread writes them in batches
+    to stdout and the (kept open) log file, flushing when a batch reaches
+    batch_size lines or is flush_interval seconds old. When the queue is
+    full, lines are either dropped or, with the 'spill' policy, appended to
+    an overflow list without blocking the caller. The worker moves that
+    overflow to <log_file>.spill while older lines are still queued and
+    replays it into the log once the queue is empty, so the log stays
+    complete and in order; the spill file is only a temporary extension of
+    the queue. If the writer cannot keep up even with that (a stalled
+    disk), the in-memory overflow stops at max_overflow lines and further
+    lines are dropped and counted like under the 'drop' policy.
+    """
+    
+    FSYNC_POLICIES = ('never', 'interval', 'batch')
+    OVERFLOW_POLICIES = ('drop', 'spill')
+    
+    def __init__(self, log_file: str = None, echo: bool = True,
+                 batch_size: int = 1000, flush_interval: float = 0.2,
+                 fsync: str = 'interval', fsync_interval: float = 1.0,
+                 max_queue: int = 100_000, overflow: str = 'drop',
+                 max_overflow: int = None):
+        """
+        Args:
+            log_file: Optional file path to append lines to
+            echo: Also write lines to stdout
+            batch_size: Flush once this many lines are pending
+            flush_interval: Flush pending lines after this many seconds
+            fsync: 'never', 'interval' (at most every fsync_interval
+                seconds) or 'batch' (after every flush)
+            fsync_interval: Seconds between fsyncs for the 'interval' policy
+            max_queue: Lines buffered before the overflow policy applies
+            overflow: 'drop' or 'spill' (buffer through <log_file>.spill)
+            max_overflow: Spilled lines held in memory before new ones are
+                dropped (default: 2 * max_queue)
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of: {', '.join(self.FSYNC_POLICIES)}")
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow policy must be one of: {', '.join(self.OVERFLOW_POLICIES)}")
+        if overflow == 'spill' and not log_file:
+            raise ValueError("overflow policy 'spill' requires a log file")
+        
+        self.echo = echo
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.max_overflow = 2 * max_queue if max_overflow is None else max_overflow
+        
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.spilled = 0
+        self.written = 0
+        
+        self._file = open(log_file, 'a', buffering=1 << 16) if log_file else None
+        self._spill_path = f"{log_file}.spill" if log_file else None
+        self._spill_file = None   # Writer thread only
+        self._spill_lines = 0     # Lines in the spill file, older than _overflow
+        self._overflow = []       # Newest spilled lines, guarded by _spill_lock
+        self._spilling = False    # While set, new lines bypass the queue
+        self._spill_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+    
+    def write(self, line: str):
+        """Queue a line without blocking; applies the overflow policy when full"""
+        if not self._spilling:
+            try:
+                self.queue.put_nowait(line)
+                return
+            except queue.Full:
+                if self.overflow == 'drop':
+                    self.dropped += 1
+                    return
+        # Once spilling, every line goes to the overflow until the writer
+        # has caught up, so queued and spilled lines never interleave
+        with self._spill_lock:
+            self._spilling = True
+            if len(self._overflow) >= self.max_overflow:
+                self.dropped += 1  # Writer stalled; do not grow without bound
+                return
+            self._overflow.append(line)
+            self.spilled += 1
+    
+    def close(self):
+        """Write everything still queued or spilled, then stop the worker and close files"""
+        self.queue.put(None)
+        self._thread.join()
+        if self._file:
+            self._file.flush()
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+            self._file.close()
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+            os.remove(self._spill_path)
+    
+    def _run(self):
+        """Worker loop: gather a batch, write it, repeat until the sentinel"""
+        get = self.queue.get
+        while True:
+            try:
+                line = get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._spilling:
+                    self._drain_overflow()
+                continue
+            if line is None:
+                self._drain_overflow()
+                return
+            batch = [line]
+            deadline = time.monotonic() + self.flush_interval
+            done = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    line = get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if line is None:
+                    done = True
+                    break
+                batch.append(line)
+            self._flush(batch)
+            if done:
+                self._drain_overflow()
+                return
+            if self._spilling:
+                if self.queue.empty():
+                    self._drain_overflow()
+                elif len(self._overflow) >= self.max_queue:
+                    self._spill_to_disk()
+    
+    def _spill_to_disk(self):
+        """Move the in-memory overflow to the end of the spill file"""
+        with self._spill_lock:
+            lines, self._overflow = self._overflow, []
+        if not lines:
+            return
+        if self._spill_file is None:
+            self._spill_file = open(self._spill_path, 'w+', buffering=1 << 16)
+        self._spill_file.seek(0, os.SEEK_END)
+        self._spill_file.write('\n'.join(lines) + '\n')
+        self._spill_lines += len(lines)
+    
+    def _drain_overflow(self):
+        """Replay spilled lines into the log (oldest first) once the queue is empty"""
+        while True:
+            if self._spill_lines:
+                # Older lines are on disk: append the rest behind them, replay the file
+                self._spill_to_disk()
+                self._spill_file.seek(0)
+                batch = []
+                for line in self._spill_file:
+                    batch.append(line.rstrip('\n'))
+                    if len(batch) == self.batch_size:
+                        self._flush(batch)
+                        batch = []
+                if batch:
+                    self._flush(batch)
+                self._spill_file.seek(0)
+                self._spill_file.truncate()
+                self._spill_lines = 0
+            with self._spill_lock:
+                lines, self._overflow = self._overflow, []
+                if not lines:
+                    self._spilling = False
+                    return
+            for start in range(0, len(lines), self.batch_size):
+                self._flush(lines[start:start + self.batch_size])
+    
+    def _flush(self, batch: list):
+        """Write one batch to every sink and apply the fsync policy"""
+        text = '\n'.join(batch) + '\n'
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if self._file:
+            self._file.write(text)
+            self._file.flush()
+            now = time.monotonic()
+            if self.fsync == 'batch' or (
+                    self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+        self.written += len(batch)
+
+
 class FileChangeLogger(FileSystemEventHandler):
     """Handler that logs all file system events with timestamps"""
     
-    def __init__(self, log_file=None):
+    def __init__(self, log_file=None, writer: BatchedLogWriter = None):
         super().__init__()
         self.log_file = log_file
+        # Lines are handed to the writer so the observer thread never waits on I/O
+        self.owns_writer = writer is None
+        self.writer = writer or BatchedLogWriter(log_file=log_file)
+    
+    def close(self):
+        """Close the writer if this handler created it"""
+        if self.owns_writer:
+            self.writer.close()
         
     def _log_event(self, event_type: str, path: str, is_directory: bool = False):
         """Log an event with timestamp"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         item_type = "directory" if is_directory else "file"
-        message = f"[{timestamp}] {event_type}: {item_type} '{path}'"
-        
-        print(message)
-        
-        if self.log_file:
-            with open(self.log_file, 'a') as f:
-                f.write(message + '\n')
+        self.writer.write(f"[{timestamp}] {event_type}: {item_type} '{path}'")
     
     def on_created(self, event: FileSystemEvent):
         """Called when a file or directory is created"""
@@ -49,19 +252,15 @@ class FileChangeLogger(FileSystemEventHandler):
         """Called when a file or directory is moved or renamed"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         item_type = "directory" if event.is_directory else "file"
-        message = f"[{timestamp}] MOVED: {item_type} from '{event.src_path}' to '{event.dest_path}'"
-        
-        print(message)
-        
-        if self.log_file:
-            with open(self.log_file, 'a') as f:
-                f.write(message + '\n')
+        self.writer.write(
+            f"[{timestamp}] MOVED: {item_type} from '{event.src_path}' to '{event.dest_path}'")
 
 
 class FileSystemMonitor:
     """Main monitor class that sets up and manages the file system observer"""
     
-    def __init__(self, watch_path: str, log_file: str = None, recursive: bool = True):
+    def __init__(self, watch_path: str, log_file: str = None, recursive: bool = True,
+                 writer_options: dict = None):
         """
         Initialize the file system monitor
         
@@ -69,11 +268,14 @@ class FileSystemMonitor:
             watch_path: Directory path to monitor
             log_file: Optional file path to write logs to
             recursive: Whether to monitor subdirectories
+            writer_options: Keyword arguments for BatchedLogWriter
         """
         self.watch_path = Path(watch_path).resolve()
         self.log_file = log_file
         self.recursive = recursive
+        self.writer_options = writer_options or {}
         self.observer = None
+        self.writer = None
         
         # Validate watch path
         if not self.watch_path.exists():
@@ -90,8 +292,9 @@ class FileSystemMonitor:
             print(f"Logging to: {self.log_file}")
         print(f"Press Ctrl+C to stop\n")
         
-        # Create event handler and observer
-        event_handler = FileChangeLogger(log_file=self.log_file)
+        # Create log writer, event handler and observer
+        self.writer = BatchedLogWriter(log_file=self.log_file, **self.writer_options)
+        event_handler = FileChangeLogger(log_file=self.log_file, writer=self.writer)
         self.observer = Observer()
         self.observer.schedule(event_handler, str(self.watch_path), recursive=self.recursive)
         
@@ -111,6 +314,12 @@ class FileSystemMonitor:
             print("\n\nStopping file system monitor...")
             self.observer.stop()
             self.observer.join()
+            self.writer.close()
+            if self.writer.dropped:
+                print(f"Dropped {self.writer.dropped} log lines (writer could not keep up)")
+            if self.writer.spilled:
+                print(f"Buffered {self.writer.spilled} log lines through "
+                      f"{self.log_file}.spill (queue full; written in order)")
             print("Monitor stopped.")
 
 
@@ -131,6 +340,9 @@ Examples:
   
   # Monitor without recursion
   python file_monitor.py /path/to/watch --no-recursive
+  
+  # Durable log: fsync every batch, spill instead of dropping under load
+  python file_monitor.py /path/to/watch --log changes.log --fsync batch --overflow spill
         """
     )
     
@@ -150,13 +362,58 @@ Examples:
         help='Do not monitor subdirectories'
     )
     
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='Flush the log after this many lines (default: 1000)'
+    )
+    parser.add_argument(
+        '--flush-interval',
+        type=float,
+        default=0.2,
+        help='Flush the log after this many seconds (default: 0.2)'
+    )
+    parser.add_argument(
+        '--fsync',
+        choices=BatchedLogWriter.FSYNC_POLICIES,
+        default='interval',
+        help='When to fsync the log file (default: interval, at most once per second)'
+    )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=100_000,
+        help='Log lines buffered before the overflow policy applies (default: 100000)'
+    )
+    parser.add_argument(
+        '--overflow',
+        choices=BatchedLogWriter.OVERFLOW_POLICIES,
+        default='drop',
+        help='What to do with log lines when the queue is full (default: drop)'
+    )
+    parser.add_argument(
+        '--quiet',
+        '-q',
+        action='store_true',
+        help='Do not echo events to stdout'
+    )
+    
     args = parser.parse_args()
     
     try:
         monitor = FileSystemMonitor(
             watch_path=args.path,
             log_file=args.log_file,
-            recursive=not args.no_recursive
+            recursive=not args.no_recursive,
+            writer_options={
+                'echo': not args.quiet,
+                'batch_size': args.batch_size,
+                'flush_interval': args.flush_interval,
+                'fsync': args.fsync,
+                'max_queue': args.queue_size,
+                'overflow': args.overflow,
+            }
         )
         monitor.start()
     except ValueError as e:
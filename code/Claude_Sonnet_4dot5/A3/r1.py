@@ -4,12 +4,52 @@ High-Throughput Asynchronous TCP Server
 Handles 1,000+ concurrent connections using event-based I/O
 """
 
+import argparse
 import asyncio
+import os
 import signal
+import socket
 import sys
 import time
 from collections import defaultdict
-from typing import Dict, Tuple
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+
+class SharedStats:
+    """
+    One worker's statistics counters in a shared memory segment.
+    
+    Behaves like the stats dict (stats['bytes_sent'] += n), but the values
+    live in the worker's own slot of int64 counters, so the supervisor can
+    read every worker's numbers without any IPC round trip. Each slot has
+    a single writer, so no locking is needed.
+    """
+    
+    FIELDS = ('total_connections', 'active_connections', 'messages_received',
+              'messages_sent', 'bytes_received', 'bytes_sent')
+    INDEX = {name: i for i, name in enumerate(FIELDS)}
+    SLOT_BYTES = 8 * len(FIELDS)
+    
+    def __init__(self, shm: shared_memory.SharedMemory, slot: int):
+        start = slot * self.SLOT_BYTES
+        self.values = shm.buf[start:start + self.SLOT_BYTES].cast('q')
+    
+    def __getitem__(self, name: str) -> int:
+        return self.values[self.INDEX[name]]
+    
+    def __setitem__(self, name: str, value: int):
+        self.values[self.INDEX[name]] = value
+
+
+class AggregatedStats:
+    """Read-only sum of all workers' SharedStats slots."""
+    
+    def __init__(self, shm: shared_memory.SharedMemory, workers: int):
+        self.slots = [SharedStats(shm, i) for i in range(workers)]
+    
+    def __getitem__(self, name: str) -> int:
+        return sum(slot[name] for slot in self.slots)
 
 class HighThroughputTCPServer:
     """
@@ -17,12 +57,23 @@ class HighThroughputTCPServer:
     Handles multiple concurrent connections efficiently without thread-per-connection.
     """
     
-    def __init__(self, host: str = '0.0.0.0', port: int = 8888):
+    def __init__(self, host: str = '0.0.0.0', port: int = 8888, stats=None,
+                 worker_id: Optional[int] = None):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (shared by all workers via SO_REUSEPORT)
+            stats: Counter mapping; defaults to a private dict, workers get
+                their SharedStats slot
+            worker_id: Set in --workers mode; workers leave reporting to
+                the supervisor
+        """
         self.host = host
         self.port = port
         self.server = None
         self.connections: Dict[Tuple[str, int], asyncio.StreamWriter] = {}
-        self.stats = defaultdict(int)
+        self.stats = defaultdict(int) if stats is None else stats
+        self.worker_id = worker_id
         self.running = False
         
     async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
@@ -127,6 +178,13 @@ class HighThroughputTCPServer:
         )
         
         addr = self.server.sockets[0].getsockname()
+        if self.worker_id is not None:
+            print(f"[{time.strftime('%H:%M:%S')}] Worker {self.worker_id} (pid {os.getpid()}) "
+                  f"listening on {addr[0]}:{addr[1]}")
+            async with self.server:
+                await self.server.serve_forever()
+            return
+        
         print(f"\n{'='*60}")
         print(f"High-Throughput TCP Server Started")
         print(f"{'='*60}")
@@ -145,16 +203,22 @@ class HighThroughputTCPServer:
         """Periodically report server statistics"""
         while self.running:
             await asyncio.sleep(10)
-            print(f"\n{'='*60}")
-            print(f"Server Statistics - {time.strftime('%H:%M:%S')}")
-            print(f"{'='*60}")
-            print(f"Active connections: {self.stats['active_connections']}")
-            print(f"Total connections: {self.stats['total_connections']}")
-            print(f"Messages received: {self.stats['messages_received']}")
-            print(f"Messages sent: {self.stats['messages_sent']}")
-            print(f"Bytes received: {self.stats['bytes_received']:,}")
-            print(f"Bytes sent: {self.stats['bytes_sent']:,}")
-            print(f"{'='*60}\n")
+            self.print_stats()
+    
+    def print_stats(self, extra: Optional[List[str]] = None):
+        """Print the statistics block (also used by the --workers supervisor)"""
+        print(f"\n{'='*60}")
+        print(f"Server Statistics - {time.strftime('%H:%M:%S')}")
+        print(f"{'='*60}")
+        print(f"Active connections: {self.stats['active_connections']}")
+        print(f"Total connections: {self.stats['total_connections']}")
+        print(f"Messages received: {self.stats['messages_received']}")
+        print(f"Messages sent: {self.stats['messages_sent']}")
+        print(f"Bytes received: {self.stats['bytes_received']:,}")
+        print(f"Bytes sent: {self.stats['bytes_sent']:,}")
+        for line in extra or ():
+            print(line)
+        print(f"{'='*60}\n")
     
     async def shutdown(self):
         """Gracefully shutdown the server"""
@@ -181,14 +245,170 @@ class HighThroughputTCPServer:
         print(f"Total messages processed: {self.stats['messages_received']}")
 
 
-async def main():
-    """Main entry point"""
-    # Configuration
-    HOST = '0.0.0.0'  # Listen on all interfaces
-    PORT = 8888       # Server port
+class WorkerSupervisor:
+    """
+    Pre-fork supervisor for --workers mode.
     
-    # Create server instance
-    server = HighThroughputTCPServer(HOST, PORT)
+    Forks N worker processes, each running its own event loop and binding
+    the same port with SO_REUSEPORT so the kernel spreads incoming
+    connections across them. Crashed workers are restarted (with backoff if
+    they keep dying right after start), and every worker's counters are
+    summed from shared memory into the regular statistics report.
+    """
+    
+    RESTART_BACKOFF_MAX = 10.0  # seconds
+    STABLE_AFTER = 5.0          # a worker that ran this long resets its backoff
+    
+    def __init__(self, host: str, port: int, workers: int, stats_interval: float = 10.0):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.stats_interval = stats_interval
+        self.shm = shared_memory.SharedMemory(create=True, size=SharedStats.SLOT_BYTES * workers)
+        self.shm.buf[:] = bytes(self.shm.size)
+        self.slots = [SharedStats(self.shm, i) for i in range(workers)]
+        self.pids: Dict[int, int] = {}          # pid -> worker slot
+        self.started_at = [0.0] * workers
+        self.backoff = [0.0] * workers
+        self.restart_at: Dict[int, float] = {}  # slot -> time of pending restart
+        self.restarts = 0
+        self.running = False
+        # Only used to render the aggregated numbers in the usual format
+        self.reporter = HighThroughputTCPServer(host, port, stats=AggregatedStats(self.shm, workers))
+    
+    def spawn(self, slot: int):
+        """Fork a worker process for the given stats slot"""
+        pid = os.fork()
+        if pid == 0:
+            # Ctrl+C reaches the whole process group; shutdown is driven by
+            # the supervisor's SIGTERM instead
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                asyncio.run(run_server(self.host, self.port, SharedStats(self.shm, slot), slot))
+            except RuntimeError:
+                pass  # loop stopped by the signal handler
+            except BaseException as e:
+                print(f"Worker {slot} error: {e}")
+                code = 1
+            sys.stdout.flush()
+            os._exit(code)  # skip the parent's atexit/shared memory cleanup
+        self.pids[pid] = slot
+        self.started_at[slot] = time.monotonic()
+    
+    def reap(self):
+        """Collect exited workers and schedule their restart"""
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.pids.pop(pid, None)
+            if slot is None:
+                continue
+            # Its connections died with it
+            self.slots[slot]['active_connections'] = 0
+            if not self.running:
+                continue
+            
+            if os.WIFSIGNALED(status):
+                reason = f"killed by signal {os.WTERMSIG(status)}"
+            else:
+                reason = f"exit code {os.waitstatus_to_exitcode(status)}"
+            now = time.monotonic()
+            if now - self.started_at[slot] >= self.STABLE_AFTER:
+                self.backoff[slot] = 0.0
+            else:
+                self.backoff[slot] = min(max(self.backoff[slot] * 2, 0.5), self.RESTART_BACKOFF_MAX)
+            print(f"[{time.strftime('%H:%M:%S')}] Worker {slot} (pid {pid}) {reason}, "
+                  f"restarting in {self.backoff[slot]:.1f}s")
+            self.restart_at[slot] = now + self.backoff[slot]
+    
+    def handle_signal(self, signum, frame):
+        print("\nReceived shutdown signal...")
+        self.running = False
+    
+    def run(self):
+        """Start the workers and supervise them until SIGINT/SIGTERM"""
+        print(f"\n{'='*60}")
+        print(f"High-Throughput TCP Server Started")
+        print(f"{'='*60}")
+        print(f"Listening on: {self.host}:{self.port}")
+        print(f"Workers: {self.workers} (SO_REUSEPORT)")
+        print(f"Supervisor PID: {os.getpid()}")
+        print(f"{'='*60}\n")
+        
+        self.running = True
+        signal.signal(signal.SIGINT, self.handle_signal)
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        for slot in range(self.workers):
+            self.spawn(slot)
+        
+        next_report = time.monotonic() + self.stats_interval
+        try:
+            while self.running:
+                time.sleep(0.2)
+                self.reap()
+                now = time.monotonic()
+                for slot, when in list(self.restart_at.items()):
+                    if when <= now and self.running:
+                        del self.restart_at[slot]
+                        self.restarts += 1
+                        self.spawn(slot)
+                if now >= next_report:
+                    next_report = now + self.stats_interval
+                    self.report()
+        finally:
+            self.shutdown()
+    
+    def report(self):
+        per_worker = [
+            f"  worker {slot}: {self.slots[slot]['active_connections']} active, "
+            f"{self.slots[slot]['total_connections']} total, "
+            f"{self.slots[slot]['messages_received']} messages"
+            for slot in range(self.workers)
+        ]
+        self.reporter.print_stats([f"Workers: {len(self.pids)}/{self.workers} "
+                                   f"(restarts: {self.restarts})"] + per_worker)
+    
+    def shutdown(self):
+        """Stop all workers, print the final totals and free the shared memory"""
+        self.running = False
+        print(f"\nStopping {len(self.pids)} workers...")
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + 5
+        while self.pids and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.pids):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.pids.pop(pid)
+        
+        stats = self.reporter.stats
+        print("Server stopped.")
+        print(f"\nFinal Statistics:")
+        print(f"Total connections served: {stats['total_connections']}")
+        print(f"Total messages processed: {stats['messages_received']}")
+        print(f"Worker restarts: {self.restarts}")
+        
+        # Drop our views before releasing the segment
+        for slot in self.slots + self.reporter.stats.slots:
+            slot.values.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+async def run_server(host: str, port: int, stats=None, worker_id: Optional[int] = None):
+    """Run one server event loop until SIGTERM/SIGINT"""
+    server = HighThroughputTCPServer(host, port, stats=stats, worker_id=worker_id)
     
     # Setup graceful shutdown
     loop = asyncio.get_running_loop()
@@ -198,8 +418,9 @@ async def main():
         asyncio.create_task(server.shutdown())
         loop.stop()
     
-    # Register signal handlers
-    for sig in (signal.SIGTERM, signal.SIGINT):
+    # Register signal handlers (workers only listen to the supervisor)
+    signals = (signal.SIGTERM,) if worker_id is not None else (signal.SIGTERM, signal.SIGINT)
+    for sig in signals:
         loop.add_signal_handler(sig, signal_handler)
     
     try:
@@ -211,12 +432,36 @@ async def main():
         await server.shutdown()
 
 
+async def main(host: str, port: int):
+    """Main entry point (single process)"""
+    await run_server(host, port)
+
+
 if __name__ == '__main__':
+    # Configuration
+    HOST = '0.0.0.0'  # Listen on all interfaces
+    PORT = 8888       # Server port
+    
+    parser = argparse.ArgumentParser(description="High-throughput asyncio TCP server")
+    parser.add_argument('--host', default=HOST, help=f"interface to bind (default {HOST})")
+    parser.add_argument('--port', type=int, default=PORT, help=f"port to bind (default {PORT})")
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help="fork N event-loop processes sharing the port via SO_REUSEPORT")
+    parser.add_argument('--stats-interval', type=float, default=10.0, metavar='SEC',
+                        help="supervisor statistics interval in --workers mode (default 10)")
+    args = parser.parse_args()
+    
+    if args.workers > 1:
+        if not hasattr(socket, 'SO_REUSEPORT') or not hasattr(os, 'fork'):
+            parser.error("--workers needs fork() and SO_REUSEPORT (Linux/BSD/macOS)")
+        WorkerSupervisor(args.host, args.port, args.workers, args.stats_interval).run()
+        sys.exit(0)
+    
     # Set optimal event loop policy for performance
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.host, args.port))
     except KeyboardInterrupt:
-        print("\nServer stopped by user")
\ No newline at end of file
+        print("\nServer stopped by user")
@@ -1,11 +1,21 @@
+import argparse
+import bisect
 import heapq
+import itertools
+import math
+import random
+import struct
+import sys
+from array import array
 
 class RunningMedianFinder:
     def __init__(self):
         self.min_heap = []  # Stores the larger half of numbers
         self.max_heap = []  # Stores the smaller half of numbers
+        self.count = 0
     
     def add(self, num):
+        self.count += 1
         if not self.max_heap or num <= -self.max_heap[0]:
             heapq.heappush(self.max_heap, -num)
         else:
@@ -23,14 +33,178 @@ class RunningMedianFinder:
         else:
             return -self.max_heap[0]
 
-# Example usage:
-if __name__ == "__main__":
+    def add_block(self, nums, out, pos, every=1):
+        # Add a block of numbers and write every `every`-th running median into out[pos:].
+        # Same balancing as add(), with heap functions bound to locals and pushpop
+        # instead of push + pop. The caller must leave room for len(nums) // every + 1 medians.
+        max_heap, min_heap = self.max_heap, self.min_heap
+        push, pushpop = heapq.heappush, heapq.heappushpop
+        count = self.count
+        for num in nums:
+            count += 1
+            if count & 1:
+                if min_heap and num > min_heap[0]:
+                    num = pushpop(min_heap, num)
+                push(max_heap, -num)
+                if count % every == 0:
+                    out[pos] = -max_heap[0]
+                    pos += 1
+            else:
+                if num < -max_heap[0]:
+                    num = -pushpop(max_heap, -num)
+                push(min_heap, num)
+                if count % every == 0:
+                    out[pos] = (-max_heap[0] + min_heap[0]) / 2
+                    pos += 1
+        self.count = count
+        return pos
+
+class ApproximateQuantileFinder:
+    """KLL sketch: bounded memory running quantiles with rank error <= epsilon (~99% prob.)."""
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self, epsilon=0.01, seed=None):
+        self.epsilon = epsilon
+        # Empirical KLL bound: epsilon ~= 2.296 / k^0.9723
+        self.k = max(8, math.ceil((2.296 / epsilon) ** (1 / 0.9723)))
+        self.compactors = [[]]  # Level h holds items of weight 2^h
+        self.size = 0
+        self.total_capacity = self.capacity(0)  # Changes only when a level is added
+        self.min = self.max = None  # Exact extremes for the q=0 / q=1 bounds
+        self.rng = random.Random(seed)
+
+    def capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def add(self, num):
+        if self.min is None or num < self.min:
+            self.min = num
+        if self.max is None or num > self.max:
+            self.max = num
+        self.compactors[0].append(num)
+        self.size += 1
+        if self.size >= self.total_capacity:
+            self.compress()
+
+    def compress(self):
+        for level, compactor in enumerate(self.compactors):
+            if len(compactor) < self.capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+                self.total_capacity = sum(self.capacity(h) for h in range(len(self.compactors)))
+            # Sort and promote every second item of the even-length tail to the next level
+            compactor.sort()
+            start = len(compactor) & 1
+            promoted = compactor[start + self.rng.getrandbits(1)::2]
+            del compactor[start:]
+            self.compactors[level + 1].extend(promoted)
+            self.size -= len(promoted)
+            return
+
+    def quantiles(self, qs=QUANTILES):
+        items = sorted((num, 1 << level) for level, c in enumerate(self.compactors) for num in c)
+        cumulative = list(itertools.accumulate(weight for _, weight in items))
+        result = []
+        for q in qs:
+            if q <= 0.0 or q >= 1.0:
+                result.append(self.min if q <= 0.0 else self.max)
+                continue
+            idx = min(bisect.bisect_left(cumulative, q * cumulative[-1]), len(items) - 1)
+            result.append(items[idx][0])
+        return result
+
+    def quantiles_with_bounds(self, qs=QUANTILES):
+        # Estimates at ranks q -/+ epsilon bound the true quantile value
+        probes = [p for q in qs for p in (q, max(0.0, q - self.epsilon), min(1.0, q + self.epsilon))]
+        estimates = self.quantiles(probes)
+        return [(q, *estimates[3 * i:3 * i + 3]) for i, q in enumerate(qs)]
+
+    def find_median(self):
+        return self.quantiles((0.5,))[0]
+
+def read_blocks(stream, fmt='i', chunk_size=1 << 20):
+    # Read whole chunks into one reusable buffer and decode them in one go
+    size = struct.calcsize(fmt)
+    chunk_size -= chunk_size % size
+    buf = bytearray(chunk_size + size)
+    view = memoryview(buf)
+    pending = 0
+    while True:
+        n = stream.readinto(view[pending:pending + chunk_size])
+        if not n:
+            break
+        filled = pending + n
+        usable = filled - filled % size
+        if usable:
+            yield view[:usable].cast(fmt)
+        pending = filled - usable
+        view[:pending] = view[usable:filled]
+
+def emit_medians(in_stream, out_stream, fmt='i', every=1, buffer_values=1 << 20):
+    # Write every `every`-th running median as native float64 into out_stream.
+    # Medians go into a preallocated array('d') that is written out whole when full.
     rmf = RunningMedianFinder()
-    
-    # Simulate adding numbers from a stream (for demonstration purposes, we use a predefined list)
-    data = [3, 1, 7, 5, 4, 2, 8, 6, 9, ...]  # This would be the continuous stream of integers
-    
-    for num in data:
-        rmf.add(num)
-        median = rmf.find_median()
-        print("Current number:", num, "Median:", median)
\ No newline at end of file
+    chunk_size = 1 << 20
+    out = array('d', bytes(8 * max(buffer_values, chunk_size // struct.calcsize(fmt) + 1)))
+    pos = 0
+    emitted = 0
+    for block in read_blocks(in_stream, fmt, chunk_size):
+        if pos + len(block) // every + 1 > len(out):
+            out_stream.write(memoryview(out)[:pos])
+            emitted += pos
+            pos = 0
+        pos = rmf.add_block(block, out, pos, every)
+    out_stream.write(memoryview(out)[:pos])
+    out_stream.flush()
+    return rmf, emitted + pos
+
+def main():
+    parser = argparse.ArgumentParser(description="Running median of a binary integer stream")
+    parser.add_argument("input", nargs="?", help="binary input file (default: stdin)")
+    parser.add_argument("--format", choices=["i", "q"], default="i", help="i=32-bit, q=64-bit native ints")
+    parser.add_argument("--emit", metavar="FILE", help="write medians as packed float64 to FILE ('-' = stdout)")
+    parser.add_argument("--every", type=int, default=1, help="emit every k-th median (default: 1)")
+    parser.add_argument("--buffer", type=int, default=1 << 20, help="output buffer size in medians")
+    parser.add_argument("--epsilon", type=float, metavar="E",
+                        help="approximate p50/p90/p99/p99.9 in bounded memory (KLL sketch, rank error E)")
+    args = parser.parse_args()
+    if args.every < 1:
+        parser.error("--every must be at least 1")
+
+    in_stream = open(args.input, "rb") if args.input else sys.stdin.buffer
+    try:
+        if args.epsilon is not None:
+            sketch = ApproximateQuantileFinder(args.epsilon)
+            add = sketch.add
+            count = 0
+            for block in read_blocks(in_stream, args.format):
+                for num in block:
+                    add(num)
+                count += len(block)
+            retained = sum(map(len, sketch.compactors))
+            print(f"Processed {count} numbers, sketch k={sketch.k} retains {retained} items")
+            for q, estimate, low, high in sketch.quantiles_with_bounds():
+                print(f"p{q * 100:g}: {estimate}  (rank error <= {sketch.epsilon:.2%}: [{low}, {high}])")
+        elif args.emit:
+            out_stream = sys.stdout.buffer if args.emit == "-" else open(args.emit, "wb")
+            try:
+                rmf, emitted = emit_medians(in_stream, out_stream, args.format, args.every, args.buffer)
+            finally:
+                if out_stream is not sys.stdout.buffer:
+                    out_stream.close()
+            print(f"Processed {rmf.count} numbers, emitted {emitted} medians", file=sys.stderr)
+        else:
+            rmf = RunningMedianFinder()
+            for block in read_blocks(in_stream, args.format):
+                for num in block:
+                    rmf.add(num)
+                    median = rmf.find_median()
+                    print("Current number:", num, "Median:", median)
+    finally:
+        if args.input:
+            in_stream.close()
+
+if __name__ == "__main__":
+    main()
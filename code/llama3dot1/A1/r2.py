@@ -1,5 +1,9 @@
+import asyncio
 import heapq
 import struct
+import sys
+from array import array
+from collections import deque
 
 class RunningMedianCalculator:
     def __init__(self):
@@ -8,14 +12,21 @@ class RunningMedianCalculator:
         self.total_count = 0
 
     def process(self, binary_stream):
-        """Process a binary stream and compute the running median."""
+        """Process a binary stream (blocking socket) and compute the running median."""
+        buffer = bytearray(65536)
+        view = memoryview(buffer)
+        pending = 0
         while True:
-            data = binary_stream.recv(4)
-            if not data:
+            # Read large buffers instead of one recv(4) syscall per integer
+            n = binary_stream.recv_into(view[pending:])
+            if not n:
                 break
 
-            num, = struct.unpack('>i', data)  # Unpack the integer value from the binary stream
-            self.insert(num)
+            filled = pending + n
+            usable = filled - filled % 4
+            self.insert_block(decode_big_endian(view[:usable]))
+            pending = filled - usable
+            view[:pending] = view[usable:filled]
 
     def insert(self, num):
         """Insert a number into the heaps to maintain balance and update running median."""
@@ -32,9 +43,35 @@ class RunningMedianCalculator:
         elif len(self.upper_half) > len(self.lower_half):
             heapq.heappush(self.lower_half, -heapq.heappop(self.upper_half))
 
-        # Compute running median
+        return self.median()
+
+    def insert_block(self, nums):
+        """Insert many numbers at once (heap functions bound to locals, no per-number median)."""
+        lower, upper = self.lower_half, self.upper_half
+        push, pushpop = heapq.heappush, heapq.heappushpop
+        count = self.total_count
+
+        for num in nums:
+            count += 1
+            if count % 2 == 1:
+                # Lower half grows: route through the upper half if needed
+                if upper and num > upper[0]:
+                    num = pushpop(upper, num)
+                push(lower, -num)
+            else:
+                # Upper half grows: route through the lower half if needed
+                if num < -lower[0]:
+                    num = -pushpop(lower, -num)
+                push(upper, num)
+
+        self.total_count = count
+
+    def median(self):
+        """Return the current running median (None before the first number)."""
+        if self.total_count == 0:
+            return None
         if self.total_count % 2 == 1:
-            # Odd count: Median is the maximum value in lower half (or minimum value in upper half)
+            # Odd count: Median is the maximum value in lower half
             return -self.lower_half[0]
         else:
             # Even count: Median is the average of max in lower half and min in upper half
@@ -43,29 +80,183 @@ class RunningMedianCalculator:
 
             return (max_lower + min_upper) / 2
 
-# Example usage:
-if __name__ == "__main__":
-    import socket
-    calculator = RunningMedianCalculator()
+class WindowedMedianCalculator:
+    """
+    Running median of the last `window` numbers, with the same insert,
+    insert_block and median methods as RunningMedianCalculator.
 
-    # Create a TCP server to receive the binary stream
-    host, port = 'localhost', 12345
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.bind((host, port))
-    sock.listen(1)
+    An evicted number stays in its heap, counted in `expired`, until it
+    reaches the top; both heaps are rebuilt once more than half of their
+    entries are expired.
+    """
 
-    print("Server listening on", (host, port))
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.recent = deque()  # Window contents in arrival order
+        self.lower_half = []   # Max heap (negated)
+        self.upper_half = []   # Min heap
+        self.lower_size = 0    # Live entries per heap
+        self.upper_size = 0
+        self.expired = {}      # number -> evicted copies still in a heap
+        self.total_count = 0
 
-    while True:
-        connection, address = sock.accept()
-        binary_stream = connection.makefile('rb')
+    def insert(self, num):
+        """Insert a number, evicting the oldest one once the window is full, and return the median."""
+        self.insert_block((num,))
+        return self.median()
+
+    def insert_block(self, nums):
+        """Insert many numbers at once (evict first, then grow the half that keeps sizes balanced)."""
+        lower, upper, recent, expired = self.lower_half, self.upper_half, self.recent, self.expired
+        push, pushpop = heapq.heappush, heapq.heappushpop
+        window = self.window
+
+        for num in nums:
+            recent.append(num)
+            if len(recent) > window:
+                old = recent.popleft()
+                expired[old] = expired.get(old, 0) + 1
+                if lower and old <= -lower[0]:
+                    self.lower_size -= 1
+                    self._discard_expired(lower, -1)
+                else:
+                    self.upper_size -= 1
+                    self._discard_expired(upper, 1)
+
+            if self.lower_size <= self.upper_size:
+                # Lower half grows: route through the upper half if needed
+                if upper and num > upper[0]:
+                    num = pushpop(upper, num)
+                    self._discard_expired(upper, 1)
+                push(lower, -num)
+                self.lower_size += 1
+            else:
+                # Upper half grows: route through the lower half if needed
+                if num < -lower[0]:
+                    num = -pushpop(lower, -num)
+                    self._discard_expired(lower, -1)
+                push(upper, num)
+                self.upper_size += 1
+
+            if len(lower) + len(upper) > 2 * window:
+                self._rebuild()
+
+        self.total_count += len(nums)
+
+    def _discard_expired(self, heap, sign):
+        """Pop evicted numbers off the top of heap (sign -1 for the negated lower half)."""
+        expired = self.expired
+        while heap and expired.get(sign * heap[0]):
+            expired[sign * heap[0]] -= 1
+            heapq.heappop(heap)
+
+    def _rebuild(self):
+        """Rebuild both heaps from the window contents."""
+        ordered = sorted(self.recent)
+        self.lower_size = (len(ordered) + 1) // 2
+        self.upper_size = len(ordered) - self.lower_size
+        self.lower_half[:] = [-num for num in ordered[self.lower_size - 1::-1]]
+        self.upper_half[:] = ordered[self.lower_size:]
+        self.expired.clear()
+
+    def median(self):
+        """Return the median of the current window (None before the first number)."""
+        if not self.recent:
+            return None
+        if self.lower_size > self.upper_size:
+            return -self.lower_half[0]
+        return (-self.lower_half[0] + self.upper_half[0]) / 2
+
+def decode_big_endian(data):
+    """Decode a buffer of big-endian 32-bit integers in one go."""
+    values = array('i')
+    values.frombytes(data)
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+class MedianServer:
+    """
+    Asyncio ingestion front-end: many producer connections feed one shared
+    RunningMedianCalculator while other connections query it on the same port.
+
+    Protocol: the first byte of a connection selects its role.
+      b'P'  producer - the rest of the connection is big-endian int32 values
+      b'Q'  query    - this and every further b'Q' byte is answered with
+                       struct '>dQ' (median, count); median is NaN while empty
+    """
+
+    QUERY_REPLY = struct.Struct('>dQ')
+
+    def __init__(self, calculator, read_size=65536, report_every=1_000_000):
+        self.calculator = calculator
+        self.read_size = read_size
+        self.report_every = report_every
+        self.producers = 0
+
+    async def handle(self, reader, writer):
+        try:
+            role = await reader.readexactly(1)
+            if role == b'P':
+                await self.ingest(reader)
+            elif role == b'Q':
+                await self.answer_queries(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def ingest(self, reader):
+        self.producers += 1
+        pending = b''
         try:
-            for i in range(10**8):
-                median = calculator.process(binary_stream)
-                if i % 1000000 == 0:
-                    print(f"Median after {i} numbers: {median}")
-        except KeyboardInterrupt:
-            break
+            while True:
+                data = await reader.read(self.read_size)
+                if not data:
+                    break
+                if pending:
+                    data = pending + data
+                usable = len(data) - len(data) % 4
+
+                # Decoding and inserting run without awaiting, so queries see whole blocks
+                before = self.calculator.total_count
+                self.calculator.insert_block(decode_big_endian(memoryview(data)[:usable]))
+                pending = data[usable:]
+
+                after = self.calculator.total_count
+                if after // self.report_every > before // self.report_every:
+                    print(f"Median after {after} numbers: {self.calculator.median()}")
         finally:
-            binary_stream.close()
-            connection.close()
+            self.producers -= 1
+
+    async def answer_queries(self, reader, writer):
+        request = b'Q'
+        while request:
+            median = self.calculator.median()
+            reply = self.QUERY_REPLY.pack(float('nan') if median is None else median,
+                                          self.calculator.total_count)
+            writer.write(reply * request.count(b'Q'))
+            await writer.drain()
+            request = await reader.read(64)
+
+async def serve(host, port, window=None):
+    calculator = RunningMedianCalculator() if window is None else WindowedMedianCalculator(window)
+    server = MedianServer(calculator)
+    listener = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    print("Server listening on", (host, port))
+    async with listener:
+        await listener.serve_forever()
+
+# Example usage:
+if __name__ == "__main__":
+    host, port = 'localhost', 12345
+    if len(sys.argv) > 1:
+        port = int(sys.argv[1])
+    # Optional second argument: median of the last W numbers only
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    try:
+        asyncio.run(serve(host, port, window))
+    except KeyboardInterrupt:
+        pass
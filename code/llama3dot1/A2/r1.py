@@ -1,15 +1,108 @@
+import bz2
+import glob
+import gzip
 import logging
-from logging.handlers import RotatingFileHandler
+import lzma
 import os
+import queue
+import shutil
+import sys
+import threading
+from datetime import datetime
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+
+# Ignore rules and watch bookkeeping are shared with qwen2dot5coder/A2/r1.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from watch_filter import FilteredEventHandler, PathFilter
+
+class BackgroundRotatingFileHandler(logging.FileHandler):
+    """Size-based log rotation that never compresses on the logging thread.
+
+    A rollover is a single rename of the full file to a timestamped
+    segment followed by opening a fresh file, so logging continues at
+    once. A worker thread compresses finished segments and then deletes
+    the oldest compressed ones until they fit in retention_bytes.
+    """
+
+    COMPRESSORS = {'gzip': (gzip.open, '.gz'), 'bz2': (bz2.open, '.bz2'),
+                   'xz': (lzma.open, '.xz'), 'none': (None, '')}
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024,
+                 retention_bytes=50 * 1024 * 1024, compression='gzip'):
+        if compression not in self.COMPRESSORS:
+            raise ValueError(f'compression must be one of: {", ".join(self.COMPRESSORS)}')
+        super().__init__(filename, mode='a', encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.retention_bytes = retention_bytes
+        self.opener, self.suffix = self.COMPRESSORS[compression]
+        self.segments = queue.Queue()
+        self.worker = threading.Thread(target=self._compress_segments,
+                                       name='log-compressor', daemon=True)
+        self.worker.start()
+        # Segments left uncompressed by an earlier run
+        for leftover in sorted(glob.glob(glob.escape(self.baseFilename) + '.*')):
+            if self.suffix and not leftover.endswith(self.suffix):
+                self.segments.put(leftover)
+
+    def emit(self, record):
+        """Write the record, rolling over first if the file is full"""
+        try:
+            if self.stream is not None and self.stream.tell() >= self.max_bytes:
+                self.do_rollover()
+            super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def do_rollover(self):
+        """Swap in a fresh file; compression happens on the worker"""
+        self.stream.close()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        segment = f'{self.baseFilename}.{stamp}'
+        os.rename(self.baseFilename, segment)
+        self.stream = self._open()
+        self.segments.put(segment)
+
+    def _compress_segments(self):
+        while True:
+            segment = self.segments.get()
+            if segment is None:
+                return
+            try:
+                if self.opener:
+                    with open(segment, 'rb') as src, self.opener(segment + self.suffix, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                    os.remove(segment)
+                self._enforce_retention()
+            except OSError as e:
+                # Logging from here would recurse into this handler
+                print(f'Log compression failed for {segment}: {e}')
+
+    def _enforce_retention(self):
+        """Delete the oldest rolled segments beyond the byte budget"""
+        pattern = glob.escape(self.baseFilename) + '.*' + self.suffix
+        segments = sorted(glob.glob(pattern), reverse=True)  # timestamped names, newest first
+        total = 0
+        for segment in segments:
+            total += os.path.getsize(segment)
+            if total > self.retention_bytes:
+                os.remove(segment)
+
+    def close(self):
+        """Finish pending compression before closing"""
+        if self.worker.is_alive():
+            self.segments.put(None)
+            self.worker.join()
+        super().close()
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s [%(levelname)s] %(message)s',
-                    handlers=[RotatingFileHandler('file_system_monitor.log', maxBytes=10*1024*1024, backupCount=5)])
+                    handlers=[BackgroundRotatingFileHandler('file_system_monitor.log',
+                                                            max_bytes=10*1024*1024,
+                                                            retention_bytes=50*1024*1024,
+                                                            compression='gzip')])
 
-class FilesystemMonitor(FileSystemEventHandler):
+class FilesystemMonitor(FilteredEventHandler):
     def on_created(self, event):
         """Log file creation events"""
         logging.info(f'File created: {event.src_path}')
@@ -24,9 +117,12 @@ class FilesystemMonitor(FileSystemEventHandler):
 
 def monitor_directory(directory):
     """Start monitoring a directory for changes"""
-    event_handler = FilesystemMonitor()
+    root = os.path.abspath(directory)
     observer = Observer()
-    observer.schedule(event_handler, directory, recursive=True)
+    event_handler = FilesystemMonitor(root, PathFilter.from_directory(root), observer)
+    event_handler.watch(root)
+    logging.info(f'Watching {root} with {len(event_handler.watches)} watches '
+                 f'({len(event_handler.flat_dirs)} non-recursive)')
     observer.start()
 
     try:
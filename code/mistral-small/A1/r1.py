@@ -1,5 +1,6 @@
 import sys
 import heapq
+from collections import deque
 
 class RunningMedian:
     def __init__(self):
@@ -16,7 +17,7 @@ class RunningMedian:
         if len(self.min_heap) > len(self.max_heap) + 1:
             heapq.heappush(self.max_heap, -heapq.heappop(self.min_heap))
         elif len(self.max_heap) > len(self.min_heap):
-            heapq.heappush(self.min_heap, -heapq.heppop(self.max_heap))
+            heapq.heappush(self.min_heap, -heapq.heappop(self.max_heap))
 
     def get_median(self):
         if len(self.min_heap) == len(self.max_heap):
@@ -24,8 +25,78 @@ class RunningMedian:
         else:
             return -self.min_heap[0]
 
-def process_stream(stream):
-    running_median = RunningMedian()
+class SlidingWindowMedian:
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.count = 0
+        self.values = deque()
+        # Entries carry their stream position, so one that left the window
+        # is recognized (and popped) once it reaches the top of its heap
+        self.min_heap = []  # Max-heap of (-value, -position), lower half
+        self.max_heap = []  # Min-heap of (value, position), upper half
+        self.low_size = 0   # Entries still inside the window
+        self.high_size = 0
+
+    def add_num(self, num):
+        entry = (num, self.count)
+        self.count += 1
+        self.values.append(num)
+        if not self.min_heap or entry <= self._low_top():
+            heapq.heappush(self.min_heap, (-num, -entry[1]))
+            self.low_size += 1
+        else:
+            heapq.heappush(self.max_heap, entry)
+            self.high_size += 1
+
+        if len(self.values) > self.window:
+            oldest = (self.values.popleft(), self.count - 1 - self.window)
+            if oldest <= self._low_top():
+                self.low_size -= 1
+            else:
+                self.high_size -= 1
+            self._prune()
+
+        # Balance the heaps
+        if self.low_size > self.high_size + 1:
+            value, position = heapq.heappop(self.min_heap)
+            heapq.heappush(self.max_heap, (-value, -position))
+            self.low_size -= 1
+            self.high_size += 1
+        elif self.high_size > self.low_size:
+            value, position = heapq.heappop(self.max_heap)
+            heapq.heappush(self.min_heap, (-value, -position))
+            self.high_size -= 1
+            self.low_size += 1
+        self._prune()
+
+        if len(self.min_heap) + len(self.max_heap) > 2 * self.window:
+            start = self.count - self.window
+            self.min_heap = [e for e in self.min_heap if -e[1] >= start]
+            self.max_heap = [e for e in self.max_heap if e[1] >= start]
+            heapq.heapify(self.min_heap)
+            heapq.heapify(self.max_heap)
+
+    def _low_top(self):
+        value, position = self.min_heap[0]
+        return (-value, -position)
+
+    def _prune(self):
+        start = self.count - self.window
+        while self.min_heap and -self.min_heap[0][1] < start:
+            heapq.heappop(self.min_heap)
+        while self.max_heap and self.max_heap[0][1] < start:
+            heapq.heappop(self.max_heap)
+
+    def get_median(self):
+        if self.low_size == self.high_size:
+            return (-self.min_heap[0][0] + self.max_heap[0][0]) / 2.0
+        else:
+            return -self.min_heap[0][0]
+
+def process_stream(stream, window=None):
+    running_median = RunningMedian() if window is None else SlidingWindowMedian(window)
     for num in stream:
         running_median.add_num(num)
         median = running_median.get_median()
@@ -1,9 +1,14 @@
+import os
+import sys
 import time
 from datetime import datetime
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
-class MyHandler(FileSystemEventHandler):
+# Ignore rules and watch bookkeeping are shared with llama3dot1/A2/r1.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared'))
+from watch_filter import FilteredEventHandler, PathFilter
+
+class MyHandler(FilteredEventHandler):
     def on_created(self, event):
         if not event.is_directory:
             self.log_event('created', event.src_path)
@@ -22,9 +27,12 @@ class MyHandler(FileSystemEventHandler):
         print(f"{timestamp} - {action}: {path}")
 
 def monitor_directory(path_to_watch):
-    event_handler = MyHandler()
+    root = os.path.abspath(path_to_watch)
     observer = Observer()
-    observer.schedule(event_handler, path=path_to_watch, recursive=True)
+    event_handler = MyHandler(root, PathFilter.from_directory(root), observer)
+    event_handler.watch(root)
+    print(f"Watching {root} with {len(event_handler.watches)} watches "
+          f"({len(event_handler.flat_dirs)} non-recursive)")
     observer.start()
     try:
         while True:
@@ -0,0 +1,296 @@
+"""Ignore rules and watch planning shared by the filtered A2 monitors.
+
+The qwen2dot5coder and llama3dot1 r1 monitors subclass FilteredEventHandler
+and only decide how to log; filtering and watch bookkeeping live here.
+"""
+import os
+import re
+from watchdog.events import FileSystemEventHandler
+
+# Noise that is almost never worth logging; the watched directory's
+# .gitignore is appended to these if present.
+DEFAULT_IGNORES = [
+    '.git/', '.hg/', '.svn/', 'node_modules/', '__pycache__/', '.mypy_cache/',
+    '.pytest_cache/', '.tox/', '.venv/', '*.swp', '*.swo', '*.swx', '*~',
+    '.#*', '4913', '.DS_Store', '*.pyc',
+]
+
+class PathFilter:
+    """gitignore-style ignore rules, compiled once.
+
+    Literal patterns ('node_modules/', '/build/out') are looked up per path
+    component: unanchored names in a dict, anchored paths in a prefix trie.
+    Patterns with wildcards are folded into one combined regex. As in git,
+    the last pattern matching a path decides, a '!' pattern re-includes
+    what earlier ones ignore, and nothing below an ignored directory can
+    be re-included.
+    """
+
+    GLOB_CHARS = set('*?[')
+
+    def __init__(self, patterns=()):
+        self.names = {}      # unanchored literal name -> (file rule, directory rule)
+        self.trie = {}       # anchored literal path, one dict level per component
+        globs = []           # (regex, anchored, dir_only, negate, rule) in pattern order
+        for rule, raw in enumerate(patterns):
+            pattern = raw.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negate = pattern.startswith('!')
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith('/')
+            pattern = pattern.strip('/') if dir_only else pattern
+            anchored = raw.strip().lstrip('!').startswith('/') or '/' in pattern
+            pattern = pattern.lstrip('/')
+            if not pattern:
+                continue
+            if negate or self.GLOB_CHARS & set(pattern):
+                globs.append((self._glob_to_regex(pattern), anchored, dir_only, negate, rule))
+            elif anchored:
+                node = self.trie
+                for part in pattern.split('/'):
+                    node = node.setdefault(part, {})
+                node[None] = self._literal_rule(node.get(None), rule, dir_only)
+            else:
+                self.names[pattern] = self._literal_rule(self.names.get(pattern), rule, dir_only)
+        self.negations = any(glob[3] for glob in globs)
+        if not self.negations:
+            # Without re-includes a match at any level ignores the path, so
+            # one search covers the path and all of its parent directories;
+            # dir-only patterns match the path itself only if it is a directory
+            self.ignore_re = self._join(globs, '(?:/|$)', '/')
+            self.dir_only_re = self._join([g for g in globs if g[2]], '$', '$')
+        else:
+            # Matched one level at a time, latest pattern first, so the
+            # alternative that matches (m.lastindex) is the one that decides
+            globs.reverse()
+            file_globs = [g for g in globs if not g[2]]
+            self.dir_rules = [(rule, negate) for *_, negate, rule in globs]
+            self.file_rules = [(rule, negate) for *_, negate, rule in file_globs]
+            self.level_dir_re = self._join(globs, '$', '$', level=True)
+            self.level_file_re = self._join(file_globs, '$', '$', level=True)
+
+    @staticmethod
+    def _literal_rule(current, rule, dir_only):
+        """(file rule, directory rule): the latest literal pattern for each, or -1."""
+        file_rule, dir_rule = current or (-1, -1)
+        return (file_rule if dir_only else rule, rule)
+
+    @staticmethod
+    def _join(globs, tail, dir_only_tail, level=False):
+        """One regex for all globs; level regexes capture which one matched."""
+        if not globs:
+            return None
+        alternatives = []
+        for regex, anchored, dir_only, _, _ in globs:
+            start = '^' if anchored else '(?:.*/)?' if level else '(?:^|/)'
+            alternative = start + regex + (dir_only_tail if dir_only else tail)
+            alternatives.append(f'({alternative})' if level else alternative)
+        return re.compile('|'.join(alternatives))
+
+    @classmethod
+    def from_directory(cls, root, extra=()):
+        """Default ignores, the root's .gitignore (if any) and extra patterns."""
+        patterns = list(DEFAULT_IGNORES)
+        try:
+            with open(os.path.join(root, '.gitignore')) as f:
+                patterns += f.read().splitlines()
+        except OSError:
+            pass
+        return cls(patterns + list(extra))
+
+    @staticmethod
+    def _glob_to_regex(pattern):
+        out = []
+        i = 0
+        while i < len(pattern):
+            c = pattern[i]
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            if c == '*':
+                out.append('[^/]*')
+            elif c == '?':
+                out.append('[^/]')
+            elif c == '[':
+                end = pattern.find(']', i + 1)
+                if end < 0:
+                    out.append(re.escape(c))
+                else:
+                    body = pattern[i + 1:end]
+                    if body.startswith('!'):
+                        body = '^' + body[1:]
+                    out.append(f'[{body}]')
+                    i = end
+            else:
+                out.append(re.escape(c))
+            i += 1
+        return ''.join(out)
+
+    def is_ignored(self, rel_path, is_directory=False):
+        """rel_path uses '/' separators and is relative to the watched root."""
+        parts = rel_path.split('/')
+        last = len(parts) - 1
+        node = self.trie
+        for i, part in enumerate(parts):
+            is_dir = i < last or is_directory
+            rule = self.names.get(part, (-1, -1))[is_dir]
+            if node is not None:
+                node = node.get(part)
+                if node is not None and None in node:
+                    rule = max(rule, node[None][is_dir])
+            if self.negations:
+                level_re, rules = ((self.level_dir_re, self.dir_rules) if is_dir
+                                   else (self.level_file_re, self.file_rules))
+                match = level_re and level_re.match('/'.join(parts[:i + 1]))
+                if match:
+                    glob_rule, negate = rules[match.lastindex - 1]
+                    if glob_rule > rule:
+                        if negate:
+                            continue  # re-included at this level
+                        return True
+            if rule >= 0:
+                return True  # this level, or a directory above the path, is ignored
+        if self.negations:
+            return False
+        if self.ignore_re is not None and self.ignore_re.search(rel_path):
+            return True
+        return (is_directory and self.dir_only_re is not None
+                and self.dir_only_re.search(rel_path) is not None)
+
+def plan_watches(root, path_filter, root_rel=''):
+    """Choose watches that cover everything not ignored and nothing ignored.
+
+    Subtrees without ignored directories get one recursive watch; a
+    directory with an ignored descendant gets a non-recursive watch and
+    its children are planned individually. root_rel is root's path
+    relative to the watched directory. Returns [(path, recursive)].
+    """
+    children = {}    # directory -> kept subdirectories
+    clean = {}       # directory -> no ignored directory below it
+    stack = [(root, root_rel, False)]
+    while stack:
+        directory, rel, visited = stack.pop()
+        if visited:
+            clean[directory] = clean[directory] and all(clean[c] for c in children[directory])
+            continue
+        kept, pruned = [], False
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    child_rel = f'{rel}/{entry.name}' if rel else entry.name
+                    if path_filter.is_ignored(child_rel, True):
+                        pruned = True
+                    else:
+                        kept.append((entry.path, child_rel))
+        except OSError:
+            pass
+        children[directory] = [path for path, _ in kept]
+        clean[directory] = not pruned
+        stack.append((directory, rel, True))
+        stack.extend((path, child_rel, False) for path, child_rel in kept)
+
+    plan = []
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        if clean[directory]:
+            plan.append((directory, True))
+        else:
+            plan.append((directory, False))
+            pending.extend(children[directory])
+    return plan
+
+class FilteredEventHandler(FileSystemEventHandler):
+    """Drops ignored events and keeps ignored directories unwatched.
+
+    Watches follow plan_watches(). Directories appearing under a
+    non-recursive watch are planned on their own. An ignored directory
+    appearing inside a recursively watched subtree (watchdog cannot
+    exclude it) makes that subtree be planned again, so the ignored
+    directory loses its watch.
+    """
+
+    def __init__(self, root, path_filter, observer):
+        super().__init__()
+        self.root = root
+        self.prefix_len = len(root.rstrip(os.sep)) + 1
+        self.filter = path_filter
+        self.observer = observer
+        self.watches = {}       # directory -> ObservedWatch
+        self.flat_dirs = set()  # directories watched without recursion
+
+    def watch(self, directory, root_rel=''):
+        """Schedule watches for a directory, skipping ignored subtrees"""
+        for path, recursive in plan_watches(directory, self.filter, root_rel):
+            self.watches[path] = self.observer.schedule(self, path, recursive=recursive)
+            if not recursive:
+                self.flat_dirs.add(path)
+
+    def relative(self, path):
+        return path[self.prefix_len:].replace(os.sep, '/')
+
+    def dispatch(self, event):
+        """Update watches, then drop ignored events before watchdog's dispatch"""
+        dest = getattr(event, 'dest_path', '')
+        if event.is_directory:
+            if event.event_type in ('deleted', 'moved'):
+                self.unwatch(event.src_path)
+            if event.event_type == 'created':
+                self.directory_added(event.src_path)
+            elif event.event_type == 'moved':
+                self.directory_added(dest)
+        if self.filter.is_ignored(self.relative(event.src_path), event.is_directory):
+            if not dest or self.filter.is_ignored(self.relative(dest), event.is_directory):
+                return
+        super().dispatch(event)
+
+    def directory_added(self, path):
+        """Cover a new directory without watching anything ignored in it"""
+        ignored = self.filter.is_ignored(self.relative(path), True)
+        parent = os.path.dirname(path)
+        if parent in self.flat_dirs:
+            if not ignored:
+                self.watch(path, self.relative(path))
+            return
+        # Usually empty, but a directory moved in from outside arrives as created
+        if not ignored and all(recursive for _, recursive in
+                               plan_watches(path, self.filter, self.relative(path))):
+            return  # Nothing ignored inside; the recursive watch above covers it
+        top = parent
+        while top not in self.watches:
+            if len(top) < self.prefix_len:
+                return  # Not below any watch
+            top = os.path.dirname(top)
+        if top not in self.flat_dirs:  # Otherwise path is already left out
+            self.replan(top)
+
+    def replan(self, directory):
+        """Replace the recursive watch on directory with a fresh plan"""
+        old = self.watches[directory]
+        # New watches first, so no event falls between the two
+        self.watch(directory, self.relative(directory))
+        if self.watches[directory] != old:
+            try:
+                self.observer.unschedule(old)
+            except (KeyError, OSError):
+                pass
+
+    def unwatch(self, path):
+        """Drop the watches of a deleted or moved-away directory and its subtree"""
+        prefix = path + os.sep
+        for directory in [d for d in self.watches if d == path or d.startswith(prefix)]:
+            watch = self.watches.pop(directory)
+            self.flat_dirs.discard(directory)
+            try:
+                self.observer.unschedule(watch)
+            except (KeyError, OSError):
+                pass
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Korrektheits- und Performance-Harness für die Python-Varianten von Task 1 (Running Median)
+
+Jede Variante unter code/*/A1/*.py bekommt denselben generierten Binärstrom
+(native 32-bit ints) und wird gegen ein exaktes Orakel geprüft. Gemessen
+werden values/s, Peak-RSS und die Latenz pro Median-Abfrage; das Ergebnis
+landet in einer CSV.
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib.util
+import io
+import json
+import random
+import subprocess
+import sys
+import time
+from array import array
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Konfiguration
+ROOT = Path(__file__).parent.parent
+CODE_PATH = ROOT / "code"
+CSV_PATH = Path(__file__).parent / "a1_harness.csv"
+VALUE_RANGE = (-1_000_000, 1_000_000)
+BUCKET_BITS = 11  # Oracle-Histogramm: 2048 Werte pro grobem Bucket
+
+# Wie jede Variante angesprochen wird: Klasse (None = Modul-Funktionen),
+# Einfüge-Methode, Median-Methode und ob die Einfüge-Methode ganze Blöcke nimmt.
+VARIANTS = {
+    "Claude_Sonnet_4dot5/A1/r1.py": ("StreamingMedian", "add_values", "get_median", True),
+    "Claude_Sonnet_4dot5/A1/r2.py": ("StreamingMedian", "add_values", "get_median", True),
+    "deepseekcoderv2/A1/r1.py": ("RunningMedianFinder", "add", "find_median", False),
+    "deepseekcoderv2/A1/r2.py": ("RunningMedianCalculator", "add_number", "get_median", False),
+    "deepseekcoderv2/A1/r3.py": (None, "add_number", "get_median", False),
+    "llama3dot1/A1/r2.py": ("RunningMedianCalculator", "insert_block", "median", True),
+    "mistral-small/A1/r1.py": ("RunningMedian", "add_num", "get_median", False),
+    "mistral-small/A1/r2.py": ("RunningMedian", "add_num", "get_median", False),
+    "mistral-small/A1/r3.py": ("RunningMedian", "add_number", "get_median", False),
+    "qwen2dot5coder/A1/r1.py": ("RunningMedian", "add_number", "get_median", False),
+}
+
+CSV_FIELDS = [
+    "variant", "status", "values", "values_per_sec", "peak_rss_kb", "queries",
+    "latency_mean_us", "latency_p99_us", "mismatches", "first_mismatch", "error",
+]
+
+
+def generate_stream(path: Path, count: int, seed: int):
+    """Erzeuge count gleichverteilte ints aus VALUE_RANGE (reproduzierbar über seed)"""
+    rng = random.Random(seed)
+    lo, hi = VALUE_RANGE
+    values = array("i", (rng.randint(lo, hi) for _ in range(count)))
+    with path.open("wb") as f:
+        values.tofile(f)
+
+
+def load_stream(path: Path) -> array:
+    values = array("i")
+    with path.open("rb") as f:
+        values.frombytes(f.read())
+    return values
+
+
+def oracle_medians(values: array, query_every: int) -> array:
+    """
+    Exakte Mediane nach jeweils query_every Werten.
+
+    Zweistufiges Histogramm über VALUE_RANGE (der Teststrom stammt immer aus
+    generate_stream): ein Zähler pro Wert plus ein grober Zähler pro Bucket
+    von 2^BUCKET_BITS Werten. Einfügen kostet O(1) pro Wert, eine Abfrage
+    läuft über die groben Buckets und dann innerhalb eines Buckets, also
+    insgesamt O(n + Abfragen * sqrt(R)) statt O(n^2 / q) beim fortlaufenden
+    Einmischen in ein sortiertes Array.
+    """
+    lo, hi = VALUE_RANGE
+    span = hi - lo + 1
+    medians = array("d")
+    if np is not None:
+        fine = np.zeros(span, dtype=np.int64)
+        coarse = np.zeros((span >> BUCKET_BITS) + 1, dtype=np.int64)
+        data = np.frombuffer(values, dtype=np.int32)
+        total = 0
+        for start in range(0, len(data), query_every):
+            idx = data[start:start + query_every].astype(np.int64) - lo
+            np.add.at(fine, idx, 1)
+            np.add.at(coarse, idx >> BUCKET_BITS, 1)
+            total += len(idx)
+            medians.append(_median(total, lambda k: _select_np(coarse, fine, k)))
+        return medians
+
+    fine = array("q", bytes(8 * span))
+    coarse = array("q", bytes(8 * ((span >> BUCKET_BITS) + 1)))
+    for start in range(0, len(values), query_every):
+        for value in values[start:start + query_every]:
+            idx = value - lo
+            fine[idx] += 1
+            coarse[idx >> BUCKET_BITS] += 1
+        total = min(start + query_every, len(values))
+        medians.append(_median(total, lambda k: _select(coarse, fine, k)))
+    return medians
+
+
+def _select(coarse, fine, k: int) -> int:
+    """k-kleinster Wert (1-basiert) aus dem zweistufigen Histogramm"""
+    bucket = 0
+    while coarse[bucket] < k:
+        k -= coarse[bucket]
+        bucket += 1
+    idx = bucket << BUCKET_BITS
+    while fine[idx] < k:
+        k -= fine[idx]
+        idx += 1
+    return VALUE_RANGE[0] + idx
+
+
+def _select_np(coarse, fine, k: int) -> int:
+    """_select mit NumPy-Präfixsummen"""
+    cum = np.cumsum(coarse)
+    bucket = int(np.searchsorted(cum, k))
+    k -= int(cum[bucket - 1]) if bucket else 0
+    base = bucket << BUCKET_BITS
+    idx = base + int(np.searchsorted(np.cumsum(fine[base:base + (1 << BUCKET_BITS)]), k))
+    return VALUE_RANGE[0] + idx
+
+
+def _median(total: int, select) -> float:
+    half = (total + 1) // 2
+    if total & 1:
+        return float(select(half))
+    return (select(half) + select(half + 1)) / 2
+
+
+def load_variant(rel_path: str):
+    """Importiere eine Variante; Beispielcode auf Modulebene schreibt nach stdout und wird verworfen"""
+    path = CODE_PATH / rel_path
+    # Wie beim Start als Skript: Geschwister-Module (z.B. r2 -> r1) sind importierbar
+    sys.path.insert(0, str(path.parent))
+    name = "a1_" + rel_path.replace("/", "_").replace("-", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module
+
+
+def run_variant(rel_path: str, stream_path: Path, oracle_path: Path, query_every: int) -> dict:
+    """Eine Variante messen (läuft im eigenen Prozess, damit Peak-RSS zuordenbar bleibt)"""
+    result = {field: "" for field in CSV_FIELDS}
+    result.update(variant=rel_path, status="ok", values=0, queries=0, mismatches=0)
+
+    values = load_stream(stream_path)
+    expected = array("d")
+    with oracle_path.open("rb") as f:
+        expected.frombytes(f.read())
+
+    class_name, add_name, median_name, takes_blocks = VARIANTS[rel_path]
+    latencies = []
+    processed = 0
+    start_time = None
+    try:
+        module = load_variant(rel_path)
+        # Import (samt Beispielcode auf Modulebene) zählt nicht zur Messung
+        start_time = time.perf_counter()
+        target = getattr(module, class_name)() if class_name else module
+        add = getattr(target, add_name)
+        median = getattr(target, median_name)
+
+        for query, start in enumerate(range(0, len(values), query_every)):
+            block = values[start:start + query_every]
+            with contextlib.redirect_stdout(io.StringIO()):
+                if takes_blocks:
+                    add(block)
+                else:
+                    for value in block:
+                        add(value)
+            processed += len(block)
+
+            t0 = time.perf_counter()
+            got = median()
+            latencies.append(time.perf_counter() - t0)
+
+            if got is None or abs(got - expected[query]) > 1e-9:
+                if not result["mismatches"]:
+                    result["first_mismatch"] = f"n={processed}: {got} != {expected[query]}"
+                result["mismatches"] += 1
+        if result["mismatches"]:
+            result["status"] = "wrong"
+    except Exception as e:  # defekte Varianten (z.B. Tippfehler im heapq-Aufruf) protokollieren
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start_time if start_time is not None else 0
+
+    result["values"] = processed
+    result["values_per_sec"] = round(processed / elapsed) if elapsed > 0 else 0
+    result["queries"] = len(latencies)
+    if latencies:
+        latencies.sort()
+        result["latency_mean_us"] = round(sum(latencies) / len(latencies) * 1e6, 2)
+        result["latency_p99_us"] = round(latencies[int(len(latencies) * 0.99)] * 1e6, 2)
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["peak_rss_kb"] = peak // 1024 if sys.platform == "darwin" else peak
+    return result
+
+
+def run_isolated(rel_path: str, stream_path: Path, oracle_path: Path,
+                 query_every: int, timeout: float) -> dict:
+    """run_variant in einem frischen Interpreter ausführen"""
+    cmd = [sys.executable, __file__, "--run-one", rel_path,
+           "--stream", str(stream_path), "--oracle", str(oracle_path),
+           "--query-every", str(query_every)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"variant": rel_path, "status": "timeout", "error": f"> {timeout:.0f}s"}
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = (proc.stderr.strip().splitlines() or ["unbekannter Fehler"])[-1]
+        return {"variant": rel_path, "status": "error", "error": error}
+    return json.loads(lines[-1])
+
+
+def print_section(title: str):
+    """Drucke einen Abschnitt-Titel"""
+    print(f"\n{'='*80}")
+    print(f"  {title}")
+    print(f"{'='*80}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harness für die Running-Median-Varianten (Task 1)")
+    parser.add_argument("--count", type=int, default=200_000, help="Anzahl Werte im Teststrom")
+    parser.add_argument("--seed", type=int, default=0, help="Seed für den Teststrom")
+    parser.add_argument("--query-every", type=int, default=1000,
+                        help="Median-Abfrage nach jeweils N Werten")
+    parser.add_argument("--timeout", type=float, default=600, help="Zeitlimit pro Variante (s)")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="Ziel-CSV")
+    parser.add_argument("--workdir", type=Path, default=Path("/tmp"),
+                        help="Ablage für Teststrom und Orakel")
+    parser.add_argument("--only", action="append", metavar="VARIANT",
+                        help="nur diese Variante(n), z.B. mistral-small/A1/r1.py")
+    # intern: eine Variante im Kindprozess messen
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--stream", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--oracle", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_variant(args.run_one, args.stream, args.oracle, args.query_every)))
+        return
+
+    variants = args.only or sorted(VARIANTS)
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"unbekannte Variante(n): {', '.join(unknown)}")
+
+    print("\n🔍 HARNESS: Running Median (Task 1, Python-Varianten)")
+    print("=" * 80)
+
+    stream_path = args.workdir / f"a1_stream_{args.count}_{args.seed}.bin"
+    oracle_path = args.workdir / f"a1_oracle_{args.count}_{args.seed}_{args.query_every}.bin"
+    if not stream_path.exists():
+        generate_stream(stream_path, args.count, args.seed)
+    t0 = time.perf_counter()
+    medians = oracle_medians(load_stream(stream_path), args.query_every)
+    with oracle_path.open("wb") as f:
+        medians.tofile(f)
+    print(f"\n✓ Teststrom: {args.count:,} Werte, Seed {args.seed} ({stream_path})")
+    print(f"✓ Orakel ({'NumPy' if np is not None else 'list.sort'}): "
+          f"{len(medians):,} Mediane in {time.perf_counter() - t0:.2f}s")
+
+    print_section("ERGEBNISSE")
+    print(f"\n  {'Variante':<30} {'Status':<8} {'values/s':>12} {'RSS (KB)':>10} "
+          f"{'Latenz µs':>10} {'Fehler':>7}")
+    print("  " + "-" * 78)
+
+    rows = []
+    for rel_path in variants:
+        row = run_isolated(rel_path, stream_path, oracle_path, args.query_every, args.timeout)
+        rows.append(row)
+        print(f"  {rel_path:<30} {row['status']:<8} {row.get('values_per_sec', 0) or 0:>12,} "
+              f"{row.get('peak_rss_kb', 0) or 0:>10,} {row.get('latency_mean_us', '') or '':>10} "
+              f"{row.get('mismatches', '') or 0:>7}")
+        if row.get("error"):
+            print(f"  {'':<30} ↳ {row['error']}")
+        elif row.get("first_mismatch"):
+            print(f"  {'':<30} ↳ {row['first_mismatch']}")
+
+    with args.csv.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n✓ CSV geschrieben: {args.csv}")
+    print("\n" + "=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+End-to-End-Benchmark für die Python-Varianten von Task 2 (Filesystem Monitoring)
+
+Ein Generator erzeugt, ändert, benennt um und löscht N Dateien pro Sekunde
+in einem verschachtelten Baum unter /tmp. Jede Variante läuft in einem
+eigenen Prozess; jede Logzeile (print oder logging) wird dort mit
+Zeitstempel erfasst. Daraus ergeben sich Latenz Syscall -> Logzeile
+(p50/p99), Verlustrate pro Ereignisart und CPU% des Monitors.
+"""
+
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Konfiguration
+ROOT = Path(__file__).parent.parent
+CODE_PATH = ROOT / "code"
+CSV_PATH = Path(__file__).parent / "a2_bench.csv"
+
+KINDS = ["created", "modified", "moved", "deleted"]
+TOKEN_RE = re.compile(r"\b([fg])(\d{7})\b")
+KIND_RE = re.compile(r"creat|modif|mov|delet", re.IGNORECASE)
+KIND_OF = {"creat": "created", "modif": "modified", "mov": "moved", "delet": "deleted"}
+
+# Varianten und Konfigurationen; "setup" benennt eine Sonderbehandlung,
+# sonst wird die erste FileSystemEventHandler-Klasse ohne Argumente erzeugt.
+CONFIGS = [
+    ("Claude_Sonnet_4dot5/A2/r1.py", "inotify", {"setup": "claude_r1", "backend": "inotify"}),
+    ("Claude_Sonnet_4dot5/A2/r1.py", "inotify, ohne Coalescing",
+     {"setup": "claude_r1", "backend": "inotify", "coalesce": 0}),
+    ("Claude_Sonnet_4dot5/A2/r1.py", "watchdog", {"setup": "claude_r1", "backend": "watchdog"}),
+    ("Claude_Sonnet_4dot5/A2/r2.py", "watchdog", {"handler": "FileChangeLogger"}),
+    ("deepseekcoderv2/A2/r1.py", "watchdog", {}),
+    ("deepseekcoderv2/A2/r2.py", "watchdog", {}),
+    ("deepseekcoderv2/A2/r3.py", "watchdog", {}),
+    ("llama3dot1/A2/r1.py", "watchdog", {"setup": "filtered"}),
+    ("llama3dot1/A2/r2.py", "watchdog", {}),
+    ("llama3dot1/A2/r3.py", "watchdog", {}),
+    ("mistral-small/A2/r1.py", "watchdog", {}),
+    ("mistral-small/A2/r2.py", "watchdog", {}),
+    ("mistral-small/A2/r3.py", "watchdog", {}),
+    ("qwen2dot5coder/A2/r1.py", "watchdog", {"setup": "filtered"}),
+    ("qwen2dot5coder/A2/r2.py", "watchdog", {}),
+    ("qwen2dot5coder/A2/r3.py", "watchdog", {}),
+]
+
+CSV_FIELDS = [
+    "variant", "backend", "rate", "status", "expected", "seen", "loss_rate",
+    "lost_created", "lost_modified", "lost_moved", "lost_deleted",
+    "p50_ms", "p99_ms", "max_ms", "cpu_percent", "error",
+]
+
+
+# ---------------------------------------------------------------------------
+# Kindprozess: Monitor starten und Logzeilen mit Zeitstempel erfassen
+# ---------------------------------------------------------------------------
+
+class LineRecorder:
+    """Merkt sich für jedes (Art, Datei-Nr.) den Zeitpunkt der ersten Logzeile"""
+
+    def __init__(self):
+        self.seen = {}
+
+    def record(self, text):
+        now = time.monotonic()
+        for line in text.splitlines():
+            match = KIND_RE.search(line)
+            if not match:
+                continue
+            kind = KIND_OF[match.group(0).lower()]
+            for prefix, number in TOKEN_RE.findall(line):
+                self.seen.setdefault(f"{kind}:{int(number)}", now)
+                if kind == "moved":
+                    break  # nur die Quelle zählt
+
+
+class RecordingStream(io.TextIOBase):
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def write(self, text):
+        self.recorder.record(text)
+        return len(text)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self, recorder):
+        super().__init__()
+        self.recorder = recorder
+
+    def emit(self, record):
+        self.recorder.record(record.getMessage())
+
+
+def load_variant(rel_path):
+    path = CODE_PATH / rel_path
+    name = "a2_" + rel_path.replace("/", "_").replace("-", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_monitor(module, root, options):
+    """Monitor der Variante auf root starten; liefert eine Stop-Funktion"""
+    setup = options.get("setup")
+    if setup == "claude_r1":
+        monitor = module.FileSystemMonitor(root, backend=options["backend"],
+                                           coalesce_window=options.get("coalesce", 0.05))
+        monitor.observer.schedule(monitor.event_handler, root, recursive=True)
+        if monitor.event_handler.reconciler:
+            monitor.event_handler.reconciler.start()
+        monitor.observer.start()
+
+        def stop():
+            monitor.observer.stop()
+            monitor.observer.join()
+            if monitor.event_handler.reconciler:
+                monitor.event_handler.reconciler.stop()
+            monitor.event_handler.close()
+        return stop
+
+    observer = module.Observer()
+    if setup == "filtered":
+        # Die Basisklasse aus code/shared/watch_filter.py steht ebenfalls im Modul
+        handler_class = next(v for v in vars(module).values() if isinstance(v, type)
+                             and issubclass(v, module.FilteredEventHandler)
+                             and v.__module__ == module.__name__)
+        handler = handler_class(root, module.PathFilter.from_directory(root), observer)
+        handler.watch(root)
+    else:
+        name = options.get("handler")
+        handler_class = getattr(module, name) if name else next(
+            v for v in vars(module).values() if isinstance(v, type)
+            and issubclass(v, module.FileSystemEventHandler)
+            and v is not module.FileSystemEventHandler)
+        handler = handler_class()
+        observer.schedule(handler, root, recursive=True)
+    observer.start()
+
+    def stop():
+        observer.stop()
+        observer.join()
+        close = getattr(handler, "close", None) or getattr(getattr(handler, "writer", None), "close", None)
+        if close:
+            close()
+    return stop
+
+
+RECORDER = LineRecorder()
+
+
+def child_main(rel_path, root, options, result_path):
+    """Läuft im Kindprozess: READY melden, bis STOP messen, Ergebnis als JSON ablegen"""
+    real_stdout = sys.stdout
+    result = {"status": "ok", "seen": {}, "cpu_seconds": 0.0, "wall_seconds": 0.0, "error": ""}
+    # Dateilogs der Varianten landen im Arbeitsverzeichnis (temporär)
+    workdir = tempfile.mkdtemp(prefix="a2bench_cwd_")
+    try:
+        os.chdir(workdir)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(RecordingHandler(RECORDER))
+        root_logger.setLevel(logging.INFO)
+        sys.stdout = RecordingStream(RECORDER)
+        module = load_variant(rel_path)
+        stop = start_monitor(module, root, options)
+    except BaseException as e:
+        sys.stdout = real_stdout
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+        Path(result_path).write_text(json.dumps(result))
+        print("FAILED", file=real_stdout, flush=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+        return
+
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    started = time.monotonic()
+    print("READY", file=real_stdout, flush=True)
+    sys.stdin.readline()  # Generator fertig und Nachlaufzeit abgewartet
+    wall = time.monotonic() - started
+    if usage:
+        end = resource.getrusage(resource.RUSAGE_SELF)
+        result["cpu_seconds"] = (end.ru_utime - usage.ru_utime) + (end.ru_stime - usage.ru_stime)
+    result["wall_seconds"] = wall
+    try:
+        stop()
+    except Exception as e:
+        result["error"] = f"stop: {type(e).__name__}: {e}"
+    sys.stdout = real_stdout
+    result["seen"] = RECORDER.seen
+    Path(result_path).write_text(json.dumps(result))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Elternprozess: Baum anlegen, Last erzeugen, auswerten
+# ---------------------------------------------------------------------------
+
+def make_tree(root, depth, fanout):
+    """Verschachtelter Verzeichnisbaum; liefert die Blattverzeichnisse"""
+    levels = [root]
+    for _ in range(depth):
+        levels = [os.path.join(parent, f"d{i}") for parent in levels for i in range(fanout)]
+    for leaf in levels:
+        os.makedirs(leaf, exist_ok=True)
+    return levels
+
+
+def generate_load(leaves, rate, duration):
+    """
+    rate Dateien pro Sekunde durch den Lebenszyklus schicken: in Schritt i
+    wird f_i erzeugt, f_(i-1) geändert, f_(i-2) -> g_(i-2) umbenannt und
+    g_(i-3) gelöscht. Liefert {"art:nr": Zeitpunkt vor dem Syscall}.
+    """
+    ops = {}
+    steps = int(rate * duration)
+    path_f = lambda i: os.path.join(leaves[i % len(leaves)], f"f{i:07d}")
+    path_g = lambda i: os.path.join(leaves[i % len(leaves)], f"g{i:07d}")
+    start = time.monotonic()
+    for i in range(steps + 3):
+        target = start + i / rate
+        delay = target - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if i < steps:
+            ops[f"created:{i}"] = time.monotonic()
+            open(path_f(i), "w").close()
+        if 0 <= i - 1 < steps:
+            ops[f"modified:{i - 1}"] = time.monotonic()
+            with open(path_f(i - 1), "a") as f:
+                f.write("x")
+        if 0 <= i - 2 < steps:
+            ops[f"moved:{i - 2}"] = time.monotonic()
+            os.rename(path_f(i - 2), path_g(i - 2))
+        if 0 <= i - 3 < steps:
+            ops[f"deleted:{i - 3}"] = time.monotonic()
+            os.remove(path_g(i - 3))
+    return ops
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return ""
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))] * 1000, 2)
+
+
+def run_config(rel_path, backend, options, rate, duration, settle, depth, fanout):
+    row = {field: "" for field in CSV_FIELDS}
+    row.update(variant=rel_path, backend=backend, rate=rate)
+    root = tempfile.mkdtemp(prefix="a2bench_", dir="/tmp")
+    result_path = os.path.join(root + "_result.json")
+    try:
+        leaves = make_tree(root, depth, fanout)
+        cmd = [sys.executable, __file__, "--child", rel_path, "--root", root,
+               "--options", json.dumps(options), "--result", result_path]
+        child = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, text=True)
+        state = child.stdout.readline().strip()
+        ops = {}
+        if state == "READY":
+            ops = generate_load(leaves, rate, duration)
+            time.sleep(settle)
+        try:
+            child.communicate("STOP\n", timeout=30)
+        except subprocess.TimeoutExpired:
+            child.kill()
+            child.communicate()
+        result = json.loads(Path(result_path).read_text()) if os.path.exists(result_path) else {
+            "status": "error", "error": f"Kindprozess beendet ({child.returncode})", "seen": {}}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        if os.path.exists(result_path):
+            os.remove(result_path)
+
+    row["status"] = result["status"]
+    row["error"] = result.get("error", "")
+    if result["status"] != "ok":
+        return row
+
+    seen = result["seen"]
+    latencies = sorted(seen[key] - t for key, t in ops.items() if key in seen)
+    lost = {kind: 0 for kind in KINDS}
+    for key in ops:
+        if key not in seen:
+            lost[key.split(":")[0]] += 1
+    row.update(expected=len(ops), seen=len(latencies),
+               loss_rate=round(1 - len(latencies) / len(ops), 4) if ops else "",
+               p50_ms=percentile(latencies, 0.5), p99_ms=percentile(latencies, 0.99),
+               max_ms=percentile(latencies, 1.0))
+    for kind in KINDS:
+        row[f"lost_{kind}"] = lost[kind]
+    if result.get("wall_seconds"):
+        row["cpu_percent"] = round(result["cpu_seconds"] / result["wall_seconds"] * 100, 1)
+    return row
+
+
+def print_section(title: str):
+    """Drucke einen Abschnitt-Titel"""
+    print(f"\n{'='*80}")
+    print(f"  {title}")
+    print(f"{'='*80}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latenz/Durchsatz-Benchmark für die Monitore (Task 2)")
+    parser.add_argument("--rate", type=int, action="append",
+                        help="Dateien pro Sekunde (je 4 Ereignisse), mehrfach angebbar (Standard: 200, 2000)")
+    parser.add_argument("--duration", type=float, default=5, help="Lastdauer pro Lauf (s)")
+    parser.add_argument("--settle", type=float, default=1.0, help="Nachlaufzeit für späte Ereignisse (s)")
+    parser.add_argument("--depth", type=int, default=3, help="Tiefe des Verzeichnisbaums")
+    parser.add_argument("--fanout", type=int, default=4, help="Unterverzeichnisse pro Ebene")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="Ziel-CSV")
+    parser.add_argument("--only", action="append", metavar="VARIANT",
+                        help="nur diese Variante(n), z.B. Claude_Sonnet_4dot5/A2/r1.py")
+    # intern: Monitor im Kindprozess
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args.child, args.root, json.loads(args.options), args.result)
+        return
+
+    rates = args.rate or [200, 2000]
+    configs = [c for c in CONFIGS if not args.only or c[0] in args.only]
+
+    print("\n🔍 BENCHMARK: Filesystem Monitoring (Task 2, Python-Varianten)")
+    print("=" * 80)
+    print(f"\n✓ Baum: Tiefe {args.depth}, Fanout {args.fanout}; Last: {args.duration:g}s pro Lauf, "
+          f"Raten {', '.join(map(str, rates))} Dateien/s (x4 Ereignisse)")
+
+    print_section("ERGEBNISSE")
+    print(f"\n  {'Variante':<30} {'Backend':<24} {'Rate':>5} {'Verlust':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'CPU%':>6}")
+    print("  " + "-" * 94)
+
+    rows = []
+    for rel_path, backend, options in configs:
+        for rate in rates:
+            row = run_config(rel_path, backend, options, rate, args.duration, args.settle,
+                             args.depth, args.fanout)
+            rows.append(row)
+            if row["status"] != "ok":
+                print(f"  {rel_path:<30} {backend:<24} {rate:>5} ↳ {row['error']}")
+                break  # höhere Raten scheitern genauso
+            loss = f"{row['loss_rate'] * 100:.1f}%" if row["loss_rate"] != "" else ""
+            print(f"  {rel_path:<30} {backend:<24} {rate:>5} {loss:>8} {row['p50_ms']:>8} "
+                  f"{row['p99_ms']:>8} {row['cpu_percent']:>6}")
+            lost = ", ".join(f"{k}: {row[f'lost_{k}']}" for k in KINDS if row[f"lost_{k}"])
+            if lost:
+                print(f"  {'':<30} ↳ verloren/gefaltet: {lost}")
+
+    with args.csv.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n✓ CSV geschrieben: {args.csv}")
+    print("\n" + "=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    main()